@@ -4,63 +4,236 @@ Adds endpoints for multi-region, EV, battery, and DER features
 """
 
 from flask import Blueprint, jsonify, request
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+import threading
+import time
 
+import config
 from utils.multi_region import MultiRegionForecaster
 from utils.ev_predictor import EVLoadPredictor
 from utils.battery_optimizer import BatteryStorageOptimizer
 from utils.der_manager import DERManager
 from utils.data_generator import EnergyDataGenerator
+from utils.json_provider import df_to_columnar
+from utils.task_queue import task_queue, should_run_async
 
 # Create blueprint
 advanced_bp = Blueprint('advanced', __name__)
 
-# Initialize advanced features
-multi_region = MultiRegionForecaster()
-ev_predictor = EVLoadPredictor(num_evs=5000)
-battery_optimizer = BatteryStorageOptimizer(capacity_mwh=100, power_rating_mw=50)
-der_manager = DERManager()
+# Guards singleton construction and the per-region training locks; reentrant because
+# some builders fetch other singletons
+_init_lock = threading.RLock()
+_region_train_locks = {}
 
-# Initialize with sample data
-generator = EnergyDataGenerator(days=30)
-sample_data = generator.generate_data()
+def _singleton(build):
+    """Cache a zero-argument builder's result, building it exactly once even under concurrent first access"""
+    instance = []
+    
+    @wraps(build)
+    def get():
+        if not instance:
+            with _init_lock:
+                if not instance:
+                    instance.append(build())
+        return instance[0]
+    return get
+
+# Advanced feature singletons are built on first use, so importing this
+# module (and cold-starting the app) only pays for endpoints actually hit
+@_singleton
+def _multi_region():
+    return MultiRegionForecaster()
+
+@_singleton
+def _ev_predictor():
+    return EVLoadPredictor(num_evs=5000)
+
+@_singleton
+def _battery_optimizer():
+    return BatteryStorageOptimizer(capacity_mwh=100, power_rating_mw=50)
+
+@_singleton
+def _der_manager():
+    return DERManager()
+
+@_singleton
+def _sample_data():
+    generator = EnergyDataGenerator(days=30)
+    return generator.generate_data()
+
+@_singleton
+def _sample_arrays():
+    """Column arrays of the (static) sample data; slicing these yields views, not copies"""
+    sample_data = _sample_data()
+    return {col: sample_data[col].to_numpy() for col in sample_data.columns}
+
+@_singleton
+def _region_executor():
+    """Worker pool for independent per-region forecasts"""
+    return ThreadPoolExecutor(max_workers=min(8, len(_multi_region().regions)))
+
+def _cache_bucket():
+    """Time bucket that expires cached payloads every ADVANCED_CACHE_TTL seconds"""
+    return int(time.time() // config.ADVANCED_CACHE_TTL)
+
+def _ensure_region_trained(region, data):
+    """Train a region model once; concurrent callers wait on the first trainer instead of retraining"""
+    multi_region = _multi_region()
+    with _init_lock:
+        lock = _region_train_locks.setdefault(region, threading.Lock())
+    with lock:
+        model = multi_region.region_models.get(region)
+        if model is None or not model.trained:
+            multi_region.train_region(region, data)
+
+def _warm_region_models():
+    """Pre-train region models so the first request skips training"""
+    sample_data = _sample_data()
+    for region in _multi_region().regions:
+        _ensure_region_trained(region, sample_data)
+
+def _train_and_predict(region, data, hours):
+    """Train a region model if needed and return its forecast"""
+    _ensure_region_trained(region, data)
+    return region, _multi_region().predict_region(region, data, hours)
+
+@lru_cache(maxsize=32)
+def _cached_multi_region(hours, bucket):
+    multi_region = _multi_region()
+    sample_data = _sample_data()
+    
+    # Generate forecasts for all regions in parallel
+    futures = [
+        _region_executor().submit(_train_and_predict, region, sample_data, hours)
+        for region in multi_region.regions
+    ]
+    predictions = dict(future.result() for future in futures)
+    
+    # Get summary
+    summary = multi_region.get_regional_summary(predictions)
+    
+    # Get optimization
+    optimization = multi_region.optimize_inter_regional_flow(predictions)
+    
+    # Convert predictions to JSON-friendly format
+    predictions_json = {}
+    for region, pred_df in predictions.items():
+        predictions_json[region] = df_to_columnar(pred_df)
+    
+    return {
+        'success': True,
+        'regions': multi_region.regions,
+        'predictions': predictions_json,
+        'summary': summary,
+        'optimization': optimization
+    }
+
+@lru_cache(maxsize=32)
+def _cached_ev(hours, bucket):
+    ev_predictor = _ev_predictor()
+    
+    # Get EV statistics
+    stats = ev_predictor.get_ev_statistics()
+    
+    # Predict EV load
+    forecast = ev_predictor.predict_ev_load(hours)
+    
+    # Optimize charging
+    optimization = ev_predictor.optimize_ev_charging(forecast)
+    
+    # V2G potential
+    v2g = ev_predictor.calculate_v2g_potential()
+    
+    # Smart charging impact
+    impact = ev_predictor.predict_smart_charging_impact(hours)
+    
+    return {
+        'success': True,
+        'fleet_statistics': stats,
+        'forecast': df_to_columnar(forecast),
+        'optimization': optimization,
+        'v2g_potential': v2g,
+        'smart_charging_impact': impact
+    }
+
+@lru_cache(maxsize=32)
+def _cached_battery(bucket):
+    battery_optimizer = _battery_optimizer()
+    sample_data = _sample_data()
+    
+    # Get battery status
+    status = battery_optimizer.get_battery_status()
+    
+    # Optimize charging schedule
+    schedule = battery_optimizer.optimize_charging_schedule(sample_data)
+    
+    # Peak shaving benefit
+    peak_shaving = battery_optimizer.calculate_peak_shaving_benefit(sample_data)
+    
+    # Arbitrage potential
+    arbitrage = battery_optimizer.calculate_arbitrage_potential(None)
+    
+    # Frequency regulation
+    regulation = battery_optimizer.calculate_frequency_regulation_value()
+    
+    # Simulation
+    simulation = battery_optimizer.simulate_operation(sample_data)
+    
+    return {
+        'success': True,
+        'status': status,
+        'schedule': df_to_columnar(schedule),
+        'peak_shaving': peak_shaving,
+        'arbitrage': arbitrage,
+        'frequency_regulation': regulation,
+        'simulation': simulation
+    }
+
+@lru_cache(maxsize=32)
+def _cached_der(hours, bucket):
+    der_manager = _der_manager()
+    horizon_data = {col: values[:hours] for col, values in _sample_arrays().items()}
+    
+    # Get portfolio summary
+    portfolio = der_manager.get_der_portfolio_summary()
+    
+    # Generate forecasts
+    solar_forecast = der_manager.predict_solar_generation(hours)
+    wind_forecast = der_manager.predict_wind_generation(hours)
+    der_forecast = der_manager.aggregate_der_forecast(hours)
+    
+    # Optimize dispatch
+    dispatch = der_manager.optimize_der_dispatch(horizon_data, der_forecast)
+    
+    # Calculate benefits
+    benefits = der_manager.calculate_der_benefits(dispatch)
+    
+    # Expansion opportunities
+    opportunities = der_manager.identify_der_expansion_opportunities(dispatch)
+    
+    return {
+        'success': True,
+        'portfolio': portfolio,
+        'solar_forecast': df_to_columnar(solar_forecast),
+        'wind_forecast': df_to_columnar(wind_forecast),
+        'aggregate_forecast': df_to_columnar(der_forecast),
+        'dispatch_schedule': df_to_columnar(dispatch),
+        'benefits': benefits,
+        'expansion_opportunities': opportunities
+    }
 
-@advanced_bp.route('/api/advanced/multi-region', methods=['GET'])
+@advanced_bp.route('/api/advanced/multi-region', methods=['GET', 'POST'])
 def get_multi_region_forecast():
     """Get multi-region energy forecast"""
     try:
         hours = int(request.args.get('hours', 24))
         
-        # Generate forecasts for all regions
-        historical_data = {}
-        predictions = {}
-        
-        for region in multi_region.regions:
-            historical_data[region] = sample_data
-            if region not in multi_region.region_models or not multi_region.region_models[region].trained:
-                multi_region.train_region(region, sample_data)
-            predictions[region] = multi_region.predict_region(region, sample_data, hours)
-        
-        # Get summary
-        summary = multi_region.get_regional_summary(predictions)
+        if should_run_async(request.args, hours):
+            job_id = task_queue.submit(_cached_multi_region, hours, _cache_bucket())
+            return jsonify({'success': True, 'job_id': job_id}), 202
         
-        # Get optimization
-        optimization = multi_region.optimize_inter_regional_flow(predictions)
-        
-        # Convert predictions to JSON-friendly format
-        predictions_json = {}
-        for region, pred_df in predictions.items():
-            predictions_json[region] = pred_df.to_dict('records')
-        
-        return jsonify({
-            'success': True,
-            'regions': multi_region.regions,
-            'predictions': predictions_json,
-            'summary': summary,
-            'optimization': optimization
-        })
+        return jsonify(_cached_multi_region(hours, _cache_bucket()))
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -70,30 +243,7 @@ def get_ev_load_prediction():
     """Get electric vehicle load prediction"""
     try:
         hours = int(request.args.get('hours', 24))
-        
-        # Get EV statistics
-        stats = ev_predictor.get_ev_statistics()
-        
-        # Predict EV load
-        forecast = ev_predictor.predict_ev_load(hours)
-        
-        # Optimize charging
-        optimization = ev_predictor.optimize_ev_charging(forecast)
-        
-        # V2G potential
-        v2g = ev_predictor.calculate_v2g_potential()
-        
-        # Smart charging impact
-        impact = ev_predictor.predict_smart_charging_impact(hours)
-        
-        return jsonify({
-            'success': True,
-            'fleet_statistics': stats,
-            'forecast': forecast.to_dict('records'),
-            'optimization': optimization,
-            'v2g_potential': v2g,
-            'smart_charging_impact': impact
-        })
+        return jsonify(_cached_ev(hours, _cache_bucket()))
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -102,70 +252,22 @@ def get_ev_load_prediction():
 def get_battery_optimization():
     """Get battery storage optimization"""
     try:
-        # Get battery status
-        status = battery_optimizer.get_battery_status()
-        
-        # Optimize charging schedule
-        schedule = battery_optimizer.optimize_charging_schedule(sample_data)
-        
-        # Peak shaving benefit
-        peak_shaving = battery_optimizer.calculate_peak_shaving_benefit(sample_data)
-        
-        # Arbitrage potential
-        arbitrage = battery_optimizer.calculate_arbitrage_potential(None)
-        
-        # Frequency regulation
-        regulation = battery_optimizer.calculate_frequency_regulation_value()
-        
-        # Simulation
-        simulation = battery_optimizer.simulate_operation(sample_data)
-        
-        return jsonify({
-            'success': True,
-            'status': status,
-            'schedule': schedule.to_dict('records'),
-            'peak_shaving': peak_shaving,
-            'arbitrage': arbitrage,
-            'frequency_regulation': regulation,
-            'simulation': simulation
-        })
+        return jsonify(_cached_battery(_cache_bucket()))
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@advanced_bp.route('/api/advanced/der', methods=['GET'])
+@advanced_bp.route('/api/advanced/der', methods=['GET', 'POST'])
 def get_der_management():
     """Get distributed energy resource management"""
     try:
         hours = int(request.args.get('hours', 24))
         
-        # Get portfolio summary
-        portfolio = der_manager.get_der_portfolio_summary()
+        if should_run_async(request.args, hours):
+            job_id = task_queue.submit(_cached_der, hours, _cache_bucket())
+            return jsonify({'success': True, 'job_id': job_id}), 202
         
-        # Generate forecasts
-        solar_forecast = der_manager.predict_solar_generation(hours)
-        wind_forecast = der_manager.predict_wind_generation(hours)
-        der_forecast = der_manager.aggregate_der_forecast(hours)
-        
-        # Optimize dispatch
-        dispatch = der_manager.optimize_der_dispatch(sample_data.head(hours), der_forecast)
-        
-        # Calculate benefits
-        benefits = der_manager.calculate_der_benefits(dispatch)
-        
-        # Expansion opportunities
-        opportunities = der_manager.identify_der_expansion_opportunities(dispatch)
-        
-        return jsonify({
-            'success': True,
-            'portfolio': portfolio,
-            'solar_forecast': solar_forecast.to_dict('records'),
-            'wind_forecast': wind_forecast.to_dict('records'),
-            'aggregate_forecast': der_forecast.to_dict('records'),
-            'dispatch_schedule': dispatch.to_dict('records'),
-            'benefits': benefits,
-            'expansion_opportunities': opportunities
-        })
+        return jsonify(_cached_der(hours, _cache_bucket()))
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -174,6 +276,11 @@ def get_der_management():
 def get_advanced_features_summary():
     """Get summary of all advanced features"""
     try:
+        multi_region = _multi_region()
+        ev_predictor = _ev_predictor()
+        battery_optimizer = _battery_optimizer()
+        der_manager = _der_manager()
+        
         summary = {
             'multi_region': {
                 'enabled': True,
@@ -211,3 +318,10 @@ def register_advanced_routes(app):
     """Register advanced feature routes with Flask app"""
     app.register_blueprint(advanced_bp)
     print("✓ Advanced features API registered")
+
+def start_model_warmup():
+    """
+    Train region models off the request path; nothing blocks on this
+    Call once per serving process: a thread started before a fork does not exist in the child
+    """
+    threading.Thread(target=_warm_region_models, daemon=True).start()
@@ -2,45 +2,90 @@
 Energy Demand Forecasting Agent - Flask API
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
-import sys
-
-# Add project root to path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import config
-from utils.data_generator import EnergyDataGenerator
+from utils.data_generator import EnergyDataGenerator, EnergyArrays
 from utils.grid_optimizer import GridOptimizer
 from utils.anomaly_detector import AnomalyDetector
+from utils.json_provider import OrjsonProvider, df_to_columnar, serialize_df
+from utils.task_queue import task_queue, should_run_async
 from models.ensemble_predictor import EnsemblePredictor
 
 app = Flask(__name__)
 CORS(app)
+app.json = OrjsonProvider(app)
 
 # Global variables
 historical_data = None
 ensemble_model = None
+models_ready = False  # Set once initialize_system() has a trained model
 grid_optimizer = GridOptimizer()
 anomaly_detector = AnomalyDetector()
 
+# Column arrays of historical_data, rebuilt when the frame is replaced or its
+# length or last timestamp change
+_tail_cache = {}
+
+def reset_tail_cache():
+    """Forget the cached arrays; initialize_system() calls this before loading data"""
+    _tail_cache.update(frame=None, key=None, len=-1, index=None, arrays=None, data_start=None, data_end=None)
+
+reset_tail_cache()
+
+def get_tail_arrays(hours):
+    """Return zero-copy NumPy slices of the last `hours` rows of historical data"""
+    timestamps = historical_data['timestamp']
+    key = (len(historical_data), timestamps.iloc[-1])
+    if _tail_cache['frame'] is not historical_data or _tail_cache['key'] != key:
+        _tail_cache['arrays'] = EnergyArrays.from_dataframe(historical_data)
+        _tail_cache['index'] = historical_data.index.to_numpy()
+        _tail_cache['len'] = len(historical_data)
+        _tail_cache['data_start'] = timestamps.iloc[0].isoformat()
+        _tail_cache['data_end'] = timestamps.iloc[-1].isoformat()
+        _tail_cache['frame'] = historical_data
+        _tail_cache['key'] = key
+    
+    start = max(_tail_cache['len'] - hours, 0)
+    return _tail_cache['arrays'].tail(hours), _tail_cache['index'][start:]
+
+def get_forecast(hours):
+    """
+    Ensemble forecast shared by /api/predict and /api/optimize
+    The model memoizes predictions keyed on the input data, so new data invalidates them
+    """
+    return ensemble_model.predict_with_confidence(historical_data, hours_ahead=hours)
+
 def initialize_system():
     """Initialize the forecasting system"""
-    global historical_data, ensemble_model
+    global historical_data, ensemble_model, models_ready
+    
+    reset_tail_cache()
     
     print("Initializing Energy Demand Forecasting Agent...")
     
     # Generate or load historical data
     data_path = os.path.join(config.DATA_DIR, 'historical_data.csv')
+    parquet_path = os.path.join(config.DATA_DIR, 'historical_data.parquet')
+    
+    # The Parquet copy is only trusted while it is at least as new as the CSV it mirrors
+    parquet_fresh = os.path.exists(parquet_path) and (
+        not os.path.exists(data_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(data_path)
+    )
     
-    if os.path.exists(data_path):
+    if parquet_fresh:
+        print("Loading historical data...")
+        historical_data = pd.read_parquet(parquet_path)
+    elif os.path.exists(data_path):
         print("Loading historical data...")
-        historical_data = pd.read_csv(data_path)
-        historical_data['timestamp'] = pd.to_datetime(historical_data['timestamp'])
+        historical_data = pd.read_csv(data_path, engine='pyarrow', parse_dates=['timestamp'])
+        # Cache as Parquet so later startups skip CSV parsing
+        historical_data.to_parquet(parquet_path, engine='pyarrow', compression='snappy')
     else:
         print("Generating historical data...")
         generator = EnergyDataGenerator(days=config.HISTORICAL_DAYS)
@@ -64,6 +109,8 @@ def initialize_system():
         ensemble_model.train(historical_data)
         ensemble_model.save_models()
     
+    models_ready = ensemble_model.trained
+    
     print("System initialization complete!")
 
 @app.route('/')
@@ -71,33 +118,48 @@ def index():
     """Serve the main dashboard"""
     return render_template('index.html')
 
-@app.route('/api/predict', methods=['GET'])
+def run_forecast(hours):
+    """Generate a forecast and build the /api/predict payload"""
+    predictions = get_forecast(hours)
+    return forecast_result(predictions, hours)
+
+def forecast_result(predictions, hours):
+    """Convert forecast predictions to a JSON-friendly payload"""
+    demand = predictions['predicted_demand'].to_numpy()
+    
+    return {
+        'success': True,
+        'forecast_hours': hours,
+        'predictions': df_to_columnar(predictions),
+        'summary': {
+            'avg_demand': float(demand.mean()),
+            'max_demand': float(demand.max()),
+            'min_demand': float(demand.min()),
+            'avg_confidence': float(predictions['confidence'].to_numpy().mean())
+        }
+    }
+
+@app.route('/api/predict', methods=['GET', 'POST'])
 def predict():
     """Generate energy demand forecast"""
     try:
         hours = int(request.args.get('hours', config.FORECAST_HOURS_DEFAULT))
         hours = min(hours, config.FORECAST_DAYS_MAX * 24)  # Cap at max
         
+        # Long horizons can run as a background job (poll /api/jobs/<job_id>)
+        if should_run_async(request.args, hours):
+            return jsonify({'success': True, 'job_id': task_queue.submit(run_forecast, hours)}), 202
+        
         # Generate predictions
-        predictions = ensemble_model.predict_with_confidence(
-            historical_data, 
-            hours_ahead=hours
-        )
+        predictions = get_forecast(hours)
         
-        # Convert to JSON-friendly format
-        result = {
-            'success': True,
-            'forecast_hours': hours,
-            'predictions': predictions.to_dict('records'),
-            'summary': {
-                'avg_demand': float(predictions['predicted_demand'].mean()),
-                'max_demand': float(predictions['predicted_demand'].max()),
-                'min_demand': float(predictions['predicted_demand'].min()),
-                'avg_confidence': float(predictions['confidence'].mean())
-            }
-        }
+        # Binary formats (Arrow IPC / msgpack) on request
+        encoded = serialize_df(predictions, request.headers.get('Accept', ''))
+        if encoded is not None:
+            body, mimetype = encoded
+            return Response(body, mimetype=mimetype)
         
-        return jsonify(result)
+        return jsonify(forecast_result(predictions, hours))
     
     except Exception as e:
         return jsonify({
@@ -113,17 +175,22 @@ def get_historical():
         hours = days * 24
         
         # Get recent data
-        recent_data = historical_data.tail(hours).copy()
+        recent, index = get_tail_arrays(hours)
+        demand = recent['energy_demand']
         
         # Convert to JSON
         result = {
             'success': True,
-            'data': recent_data.to_dict('records'),
+            'data': {
+                'columns': recent.columns,
+                'index': index,
+                'data': recent.to_dict()
+            },
             'summary': {
-                'avg_demand': float(recent_data['energy_demand'].mean()),
-                'max_demand': float(recent_data['energy_demand'].max()),
-                'min_demand': float(recent_data['energy_demand'].min()),
-                'total_hours': len(recent_data)
+                'avg_demand': float(demand.mean()),
+                'max_demand': float(demand.max()),
+                'min_demand': float(demand.min()),
+                'total_hours': len(demand)
             }
         }
         
@@ -135,33 +202,41 @@ def get_historical():
             'error': str(e)
         }), 500
 
-@app.route('/api/optimize', methods=['GET'])
+def run_optimization(hours):
+    """Forecast demand and build the /api/optimize payload"""
+    # Get forecast
+    predictions = get_forecast(hours)
+    
+    # Generate recommendations
+    demand = predictions['predicted_demand'].to_numpy()
+    recommendations = grid_optimizer.generate_recommendations(demand, predictions['timestamp'].to_numpy())
+    
+    # Calculate cost optimization
+    cost_analysis = grid_optimizer.calculate_cost_optimization(predictions)
+    
+    avg_load = float(demand.mean())
+    
+    return {
+        'success': True,
+        'recommendations': recommendations,
+        'cost_analysis': cost_analysis,
+        'load_analysis': {
+            'peak_load': float(demand.max()),
+            'avg_load': avg_load,
+            'load_factor': avg_load / config.MAX_GRID_CAPACITY
+        }
+    }
+
+@app.route('/api/optimize', methods=['GET', 'POST'])
 def optimize_grid():
     """Get grid optimization recommendations"""
     try:
         hours = int(request.args.get('hours', 24))
         
-        # Get forecast
-        predictions = ensemble_model.predict(historical_data, hours_ahead=hours)
-        
-        # Generate recommendations
-        recommendations = grid_optimizer.generate_recommendations(predictions)
-        
-        # Calculate cost optimization
-        cost_analysis = grid_optimizer.calculate_cost_optimization(predictions)
-        
-        result = {
-            'success': True,
-            'recommendations': recommendations,
-            'cost_analysis': cost_analysis,
-            'load_analysis': {
-                'peak_load': float(predictions['predicted_demand'].max()),
-                'avg_load': float(predictions['predicted_demand'].mean()),
-                'load_factor': float(predictions['predicted_demand'].mean() / config.MAX_GRID_CAPACITY)
-            }
-        }
+        if should_run_async(request.args, hours):
+            return jsonify({'success': True, 'job_id': task_queue.submit(run_optimization, hours)}), 202
         
-        return jsonify(result)
+        return jsonify(run_optimization(hours))
     
     except Exception as e:
         return jsonify({
@@ -177,13 +252,13 @@ def detect_anomalies():
         hours = days * 24
         
         # Get recent data
-        recent_data = historical_data.tail(hours).copy()
+        recent, _ = get_tail_arrays(hours)
         
         # Detect anomalies
-        alerts = anomaly_detector.get_anomaly_alerts(recent_data)
+        alerts = anomaly_detector.get_anomaly_alerts(recent)
         
         # Get anomaly analysis
-        analysis = anomaly_detector.analyze_anomalies(recent_data)
+        analysis = anomaly_detector.analyze_anomalies(recent['energy_demand'])
         
         result = {
             'success': True,
@@ -208,33 +283,34 @@ def detect_anomalies():
 def get_stats():
     """Get system statistics and current status"""
     try:
+        # Recent statistics
+        recent_24h, _ = get_tail_arrays(24)
+        demand_24h = recent_24h['energy_demand']
+        
         # Current demand (last data point)
-        current_demand = float(historical_data['energy_demand'].iloc[-1])
+        current_demand = float(demand_24h[-1])
         
         # Grid status
         grid_status = grid_optimizer.get_grid_status(current_demand)
         
-        # Recent statistics
-        recent_24h = historical_data.tail(24)
-        
         result = {
             'success': True,
             'current': {
                 'demand': current_demand,
-                'timestamp': historical_data['timestamp'].iloc[-1].isoformat(),
-                'temperature': float(historical_data['temperature'].iloc[-1])
+                'timestamp': _tail_cache['data_end'],
+                'temperature': float(recent_24h['temperature'][-1])
             },
             'grid_status': grid_status,
             'last_24h': {
-                'avg_demand': float(recent_24h['energy_demand'].mean()),
-                'max_demand': float(recent_24h['energy_demand'].max()),
-                'min_demand': float(recent_24h['energy_demand'].min()),
-                'variance': float(recent_24h['energy_demand'].std())
+                'avg_demand': float(demand_24h.mean()),
+                'max_demand': float(demand_24h.max()),
+                'min_demand': float(demand_24h.min()),
+                'variance': float(demand_24h.std(ddof=1))
             },
             'system': {
                 'total_data_points': len(historical_data),
-                'data_start': historical_data['timestamp'].iloc[0].isoformat(),
-                'data_end': historical_data['timestamp'].iloc[-1].isoformat(),
+                'data_start': _tail_cache['data_start'],
+                'data_end': _tail_cache['data_end'],
                 'model_trained': ensemble_model.trained
             }
         }
@@ -247,14 +323,28 @@ def get_stats():
             'error': str(e)
         }), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll a background forecast job"""
+    status = task_queue.get_status(job_id)
+    if status is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown job id'
+        }), 404
+    
+    return jsonify({'success': True, **status})
+
+_HEALTHY_BODY_TEMPLATE = b'{"status":"healthy","timestamp":"%s","models_loaded":%s}'
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
-        'models_loaded': ensemble_model is not None and ensemble_model.trained
-    })
+    """Health check endpoint (pre-rendered body, skips the JSON encoder)"""
+    body = _HEALTHY_BODY_TEMPLATE % (
+        datetime.now().isoformat().encode(),
+        b'true' if models_ready else b'false'
+    )
+    return Response(body, mimetype='application/json', direct_passthrough=True)
 
 if __name__ == '__main__':
     # Initialize system
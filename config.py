@@ -21,15 +21,19 @@ LSTM_CONFIG = {
     'dropout_rate': 0.2,
     'epochs': 50,
     'batch_size': 32,
-    'validation_split': 0.2
+    'validation_split': 0.2,
+    'mixed_precision': 'mixed_float16'  # Keras policy used when a GPU is present (None to disable)
 }
 
 PROPHET_CONFIG = {
+    'backend': 'prophet',  # 'prophet', or 'neuralprophet' to opt in to NeuralProphet (must be installed)
     'changepoint_prior_scale': 0.05,
     'seasonality_prior_scale': 10.0,
     'daily_seasonality': True,
     'weekly_seasonality': True,
-    'yearly_seasonality': True
+    'yearly_seasonality': True,
+    'uncertainty_samples': 100,  # Monte Carlo draws for yhat_lower/upper; 0 makes them equal yhat
+    'max_train_points': 4000  # Longer histories are thinned before fitting (speed/accuracy knob)
 }
 
 ENSEMBLE_WEIGHTS = {
@@ -46,6 +50,13 @@ MAX_GRID_CAPACITY = 10000  # MW
 ANOMALY_THRESHOLD = 3.0  # Z-score threshold
 ANOMALY_WINDOW = 24  # Hours to check for anomalies
 
+# API Cache Settings
+ADVANCED_CACHE_TTL = 60  # Seconds before cached advanced-feature payloads refresh
+
+# Background Task Settings
+TASK_QUEUE_WORKERS = 4
+SYNC_FORECAST_MAX_HOURS = 24  # Longer horizons may run as background jobs (async=1)
+
 # Feature Engineering
 WEATHER_IMPACT = True
 HOLIDAY_IMPACT = True
@@ -55,6 +66,7 @@ LAG_FEATURES = [1, 24, 168]  # 1h, 1d, 1w lags
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 MODEL_DIR = os.path.join(BASE_DIR, 'saved_models')
+NUMBA_CACHE_DIR = os.path.join(BASE_DIR, '.numba_cache')  # Compiled kernels persist across restarts
 
 # Create directories if they don't exist
 os.makedirs(DATA_DIR, exist_ok=True)
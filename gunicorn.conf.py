@@ -0,0 +1,21 @@
+"""
+Gunicorn configuration for the Energy Demand Forecasting Agent
+"""
+
+import multiprocessing
+import os
+import config as app_config
+
+bind = f"{app_config.HOST}:{app_config.PORT}"
+workers = multiprocessing.cpu_count()
+worker_class = 'gthread'
+threads = 4
+
+# Load data and models once in the master; workers share them copy-on-write.
+# The TensorFlow build initializes per worker instead: TF's runtime threads do not survive fork
+preload_app = os.environ.get('WSGI_APP_MODULE', 'app_lite') != 'app'
+
+def post_worker_init(worker):
+    """Background threads started before the fork would not exist here, so start them per worker"""
+    import wsgi
+    wsgi.start_background_tasks()
@@ -2,20 +2,61 @@
 Ensemble Predictor combining LSTM and Prophet models
 """
 
+import logging
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 import config
 from models.lstm_model import LSTMForecaster
 from models.prophet_model import ProphetForecaster
+from models.prediction_cache import PredictionCache
 from utils.preprocessor import DataPreprocessor
+from utils.metrics import forecast_errors
+
+try:
+    from models.neural_prophet_model import NeuralProphetForecaster
+except ImportError:
+    NeuralProphetForecaster = None
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+logger = logging.getLogger(__name__)
+
+def _prophet_backend():
+    """
+    Forecaster class and constructor arguments for the ensemble's Prophet member
+    NeuralProphet predicts far faster than Prophet but is an explicit opt-in (backend='neuralprophet')
+    """
+    if config.PROPHET_CONFIG.get('backend') == 'neuralprophet':
+        if NeuralProphetForecaster is None:
+            raise ImportError("PROPHET_CONFIG['backend'] is 'neuralprophet' but neuralprophet is not installed")
+        return NeuralProphetForecaster, {}
+    # The ensemble only uses yhat and derives its own uncertainty, so skip Prophet's sampling
+    return ProphetForecaster, {'uncertainty_samples': 0}
+
+def _build_prophet_forecaster():
+    forecaster_cls, kwargs = _prophet_backend()
+    return forecaster_cls(**kwargs)
 
 class EnsemblePredictor:
     def __init__(self):
         self.lstm_model = LSTMForecaster()
-        self.prophet_model = ProphetForecaster()
+        self.prophet_model = _build_prophet_forecaster()
         self.preprocessor = DataPreprocessor()
         self.weights = config.ENSEMBLE_WEIGHTS
+        self.weight_vector = np.array([self.weights['lstm'], self.weights['prophet']])
         self.trained = False
+        self.prophet_models = {}
+        self._prediction_cache = PredictionCache(maxsize=64)
+        # Runs the two model predictions side by side; threads start on first use and are reused
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        
+    def clear_cache(self):
+        """Drop memoized predictions (e.g. after new data arrives)"""
+        self._prediction_cache.clear()
         
     def train(self, df, target_column='energy_demand'):
         """Train both models"""
@@ -39,20 +80,35 @@ class EnsemblePredictor:
         self.lstm_model.train(X_train, y_train, X_val, y_val)
         
         self.trained = True
+        self.clear_cache()
         print("Ensemble training complete!")
         
         return True
     
+    def train_multi(self, dfs, target_column='energy_demand'):
+        """
+        Fit one Prophet forecaster per series in parallel
+        dfs: dict of {key: DataFrame} (e.g. per region); results go to self.prophet_models
+        """
+        keys = list(dfs)
+        jobs = [self.preprocessor.prepare_prophet_data(dfs[key], target_column) for key in keys]
+        
+        # Prophet fits are independent, so they scale across cores
+        forecaster_cls, kwargs = _prophet_backend()
+        fitted = ProphetForecaster.train_many(jobs, forecaster_cls=forecaster_cls, **kwargs)
+        
+        self.prophet_models.update(zip(keys, fitted))
+        return self.prophet_models
+    
     def predict_lstm(self, df, hours_ahead=24, target_column='energy_demand'):
         """Get LSTM predictions"""
-        # Prepare data
-        X, _, _ = self.preprocessor.prepare_lstm_data(df, target_column=target_column)
+        # Prepare only the latest input window
+        X = self.preprocessor.last_sequence(df, target_column=target_column)
         
         if len(X) == 0:
             return None
         
-        # Use last sequence for prediction
-        last_sequence = X[-1]
+        last_sequence = X[0]
         
         # Predict future
         predictions = self.lstm_model.predict_sequence(last_sequence, hours_ahead)
@@ -67,6 +123,15 @@ class EnsemblePredictor:
         forecast = self.prophet_model.predict_future(periods=hours_ahead, freq='H')
         return forecast['yhat'].values
     
+    @staticmethod
+    def _result_or_none(future, name):
+        """Result of a model prediction future, or None if the model failed"""
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("%s prediction failed (%s): %s", name, type(e).__name__, e)
+            return None
+    
     def predict(self, df, hours_ahead=24, target_column='energy_demand'):
         """
         Generate ensemble predictions
@@ -75,28 +140,37 @@ class EnsemblePredictor:
         if not self.trained:
             raise ValueError("Models not trained yet!")
         
-        # Get predictions from both models
-        try:
-            lstm_pred = self.predict_lstm(df, hours_ahead, target_column)
-        except Exception as e:
-            print(f"LSTM prediction failed: {e}")
-            lstm_pred = None
-        
-        try:
-            prophet_pred = self.predict_prophet(hours_ahead)
-        except Exception as e:
-            print(f"Prophet prediction failed: {e}")
-            prophet_pred = None
+        key = PredictionCache.make_key(df, hours_ahead, target_column)
+        return self._prediction_cache.get_or_compute(
+            key, lambda: self._predict(df, hours_ahead, target_column)
+        )
+    
+    def _predict(self, df, hours_ahead, target_column):
+        """Uncached ensemble prediction"""
+        # Get predictions from both models concurrently (TF and Stan release the GIL)
+        lstm_future = self._executor.submit(self.predict_lstm, df, hours_ahead, target_column)
+        prophet_future = self._executor.submit(self.predict_prophet, hours_ahead)
+        lstm_pred = self._result_or_none(lstm_future, 'LSTM')
+        prophet_pred = self._result_or_none(prophet_future, 'Prophet')
         
         # Combine predictions
         if lstm_pred is not None and prophet_pred is not None:
-            # Weighted average
-            ensemble_pred = (self.weights['lstm'] * lstm_pred + 
-                           self.weights['prophet'] * prophet_pred)
-            
-            # Calculate uncertainty based on disagreement
-            disagreement = np.abs(lstm_pred - prophet_pred)
-            uncertainty = disagreement * 0.5
+            if numexpr is not None:
+                # Weighted average and disagreement-based uncertainty as two fused loops
+                operands = {
+                    'wl': self.weights['lstm'], 'wp': self.weights['prophet'],
+                    'lstm': lstm_pred, 'prophet': prophet_pred
+                }
+                ensemble_pred = numexpr.evaluate('wl * lstm + wp * prophet', local_dict=operands)
+                uncertainty = numexpr.evaluate('abs(lstm - prophet) * 0.5', local_dict=operands)
+            else:
+                # Weighted average as a single (2,) @ (2, hours) product
+                stacked = np.vstack([lstm_pred, prophet_pred])
+                ensemble_pred = self.weight_vector @ stacked
+                
+                # Calculate uncertainty based on disagreement
+                disagreement = np.abs(stacked[0] - stacked[1])
+                uncertainty = disagreement * 0.5
             
         elif lstm_pred is not None:
             ensemble_pred = lstm_pred
@@ -111,16 +185,18 @@ class EnsemblePredictor:
         
         # Generate timestamps
         last_timestamp = pd.to_datetime(df['timestamp'].iloc[-1])
-        future_timestamps = [last_timestamp + pd.Timedelta(hours=i+1) for i in range(hours_ahead)]
+        future_timestamps = pd.date_range(last_timestamp + pd.Timedelta(hours=1), periods=hours_ahead, freq='H')
         
-        # Create result dataframe
+        # Create result dataframe (float32 columns: MW-level precision, half the bandwidth)
+        ensemble_pred = np.asarray(ensemble_pred, dtype=np.float32)
+        uncertainty = np.asarray(uncertainty, dtype=np.float32)
         results = pd.DataFrame({
             'timestamp': future_timestamps,
             'predicted_demand': ensemble_pred,
             'lower_bound': ensemble_pred - uncertainty,
             'upper_bound': ensemble_pred + uncertainty,
-            'lstm_prediction': lstm_pred if lstm_pred is not None else ensemble_pred,
-            'prophet_prediction': prophet_pred if prophet_pred is not None else ensemble_pred
+            'lstm_prediction': np.asarray(lstm_pred, dtype=np.float32) if lstm_pred is not None else ensemble_pred,
+            'prophet_prediction': np.asarray(prophet_pred, dtype=np.float32) if prophet_pred is not None else ensemble_pred
         })
         
         return results
@@ -130,9 +206,9 @@ class EnsemblePredictor:
         predictions = self.predict(df, hours_ahead, target_column)
         
         # Calculate confidence based on uncertainty
-        predictions['confidence'] = 100 * (1 - (predictions['upper_bound'] - predictions['lower_bound']) / 
-                                          (2 * predictions['predicted_demand']))
-        predictions['confidence'] = predictions['confidence'].clip(0, 100)
+        spread = predictions['upper_bound'].to_numpy() - predictions['lower_bound'].to_numpy()
+        confidence = 100 * (1 - spread / (2 * predictions['predicted_demand'].to_numpy()))
+        predictions['confidence'] = np.clip(confidence, 0, 100)
         
         return predictions
     
@@ -149,35 +225,30 @@ class EnsemblePredictor:
         predicted = predictions['predicted_demand'].values
         
         # Calculate metrics
-        mae = np.mean(np.abs(actual - predicted))
-        mse = np.mean((actual - predicted) ** 2)
-        rmse = np.sqrt(mse)
-        mape = np.mean(np.abs((actual - predicted) / actual)) * 100
+        metrics = forecast_errors(actual, predicted)
         
         # Check interval coverage
         in_interval = ((actual >= predictions['lower_bound'].values) & 
                       (actual <= predictions['upper_bound'].values))
-        coverage = np.mean(in_interval) * 100
-        
-        return {
-            'mae': mae,
-            'mse': mse,
-            'rmse': rmse,
-            'mape': mape,
-            'interval_coverage': coverage
-        }
+        metrics['interval_coverage'] = np.mean(in_interval) * 100
+        
+        return metrics
     
     def save_models(self):
         """Save both models"""
-        self.lstm_model.save_model('saved_models/lstm_model.h5')
+        self.lstm_model.save_model('saved_models/lstm_model')
         # Prophet model is saved automatically during training
         print("Models saved successfully!")
     
     def load_models(self):
         """Load both models"""
-        success = self.lstm_model.load_model('saved_models/lstm_model.h5')
+        success = self.lstm_model.load_model('saved_models/lstm_model')
+        if not success:
+            # Models saved before the switch to SavedModel
+            success = self.lstm_model.load_model('saved_models/lstm_model.h5')
         if success:
             self.trained = True
+            self.clear_cache()
             print("Models loaded successfully!")
         return success
 
@@ -5,37 +5,53 @@ This version uses ARIMA-like statistical methods for reliable predictions
 
 import numpy as np
 import pandas as pd
-from datetime import timedelta
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from models.prediction_cache import PredictionCache
+from utils.metrics import forecast_errors
 
 class EnsemblePredictor:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.trained = False
+        self.rng = np.random.default_rng(seed)
         self.historical_mean = None
         self.historical_std = None
-        self.hourly_patterns = None
-        self.daily_patterns = None
+        self.hourly_lut = None
+        self.daily_lut = None
+        self._prediction_cache = PredictionCache(maxsize=64)
+        
+    def clear_cache(self):
+        """Drop memoized predictions (e.g. after new data arrives)"""
+        self._prediction_cache.clear()
+        
+    def _pattern_lut(self, keys, values, size):
+        """Mean of values per key in [0, size); keys never seen fall back to the historical mean"""
+        sums = np.bincount(keys, weights=values, minlength=size)
+        counts = np.bincount(keys, minlength=size)
+        return np.where(counts > 0, sums / np.maximum(counts, 1), self.historical_mean)
         
     def train(self, df, target_column='energy_demand'):
         """Train using statistical patterns"""
         print("Training statistical forecasting model...")
         
         # Calculate historical statistics
-        self.historical_mean = df[target_column].mean()
-        self.historical_std = df[target_column].std()
+        values = df[target_column].to_numpy(dtype=np.float64)
+        self.historical_mean = values.mean()
+        self.historical_std = values.std(ddof=1)
+        
+        # Parse only if the column is not already datetime64 (e.g. raw CSV strings)
+        timestamps = df['timestamp']
+        if not pd.api.types.is_datetime64_any_dtype(timestamps):
+            timestamps = pd.to_datetime(timestamps)
+        timestamps = timestamps.dt
         
         # Learn hourly patterns
-        df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-        self.hourly_patterns = df.groupby('hour')[target_column].mean().to_dict()
+        self.hourly_lut = self._pattern_lut(timestamps.hour.to_numpy(), values, 24)
         
         # Learn day of week patterns
-        df['day_of_week'] = pd.to_datetime(df['timestamp']).dt.dayofweek
-        self.daily_patterns = df.groupby('day_of_week')[target_column].mean().to_dict()
+        self.daily_lut = self._pattern_lut(timestamps.dayofweek.to_numpy(), values, 7)
         
         self.trained = True
+        self.clear_cache()
         print("Statistical model training complete!")
         return True
     
@@ -44,38 +60,34 @@ class EnsemblePredictor:
         if not self.trained:
             self.train(df, target_column)
         
+        key = PredictionCache.make_key(df, hours_ahead, target_column)
+        return self._prediction_cache.get_or_compute(
+            key, lambda: self._predict(df, hours_ahead, target_column)
+        )
+    
+    def _predict(self, df, hours_ahead, target_column):
+        """Uncached statistical prediction"""
         # Get last timestamp
-        last_timestamp = pd.to_datetime(df['timestamp'].iloc[-1])
+        last_timestamp = df['timestamp'].iloc[-1]
+        if not isinstance(last_timestamp, pd.Timestamp):
+            last_timestamp = pd.to_datetime(last_timestamp)
         
         # Generate future timestamps
-        future_timestamps = [last_timestamp + timedelta(hours=i+1) for i in range(hours_ahead)]
-        
-        # Generate predictions based on patterns
-        predictions = []
-        for ts in future_timestamps:
-            hour = ts.hour
-            day_of_week = ts.dayofweek
-            
-            # Base prediction from hourly pattern
-            base_pred = self.hourly_patterns.get(hour, self.historical_mean)
-            
-            # Adjust for day of week
-            daily_factor = self.daily_patterns.get(day_of_week, self.historical_mean) / self.historical_mean
-            
-            # Final prediction
-            pred = base_pred * daily_factor
-            
-            # Add small random variation
-            pred += np.random.normal(0, self.historical_std * 0.05)
-            
-            predictions.append(pred)
-        
-        predictions = np.array(predictions)
+        future_timestamps = pd.date_range(last_timestamp + pd.Timedelta(hours=1), periods=hours_ahead, freq='H')
+        
+        # Base prediction from hourly pattern, adjusted for day of week
+        base_pred = self.hourly_lut[future_timestamps.hour.to_numpy()]
+        daily_factor = self.daily_lut[future_timestamps.dayofweek.to_numpy()] / self.historical_mean
+        predictions = base_pred * daily_factor
+        
+        # Add small random variation
+        predictions += self.rng.normal(0, self.historical_std * 0.05, hours_ahead)
         
         # Calculate uncertainty
-        uncertainty = self.historical_std * 0.3
+        uncertainty = np.float32(self.historical_std * 0.3)
         
-        # Create result dataframe
+        # Create result dataframe (float32 columns: MW-level precision, half the bandwidth)
+        predictions = predictions.astype(np.float32)
         results = pd.DataFrame({
             'timestamp': future_timestamps,
             'predicted_demand': predictions,
@@ -95,8 +107,7 @@ class EnsemblePredictor:
         confidence_decay = np.exp(-np.arange(hours_ahead) / (hours_ahead * 0.5))
         base_confidence = 85  # Base confidence percentage
         
-        predictions['confidence'] = base_confidence * confidence_decay
-        predictions['confidence'] = predictions['confidence'].clip(60, 95)
+        predictions['confidence'] = np.clip(base_confidence * confidence_decay, 60, 95).astype(np.float32)
         
         return predictions
     
@@ -111,8 +122,8 @@ class EnsemblePredictor:
                 'trained': self.trained,
                 'historical_mean': self.historical_mean,
                 'historical_std': self.historical_std,
-                'hourly_patterns': self.hourly_patterns,
-                'daily_patterns': self.daily_patterns
+                'hourly_lut': self.hourly_lut,
+                'daily_lut': self.daily_lut
             }, f)
         print("Statistical model saved!")
     
@@ -128,8 +139,14 @@ class EnsemblePredictor:
                 self.trained = data['trained']
                 self.historical_mean = data['historical_mean']
                 self.historical_std = data['historical_std']
-                self.hourly_patterns = data['hourly_patterns']
-                self.daily_patterns = data['daily_patterns']
+                if 'hourly_lut' in data:
+                    self.hourly_lut = data['hourly_lut']
+                    self.daily_lut = data['daily_lut']
+                else:
+                    # Older saves stored the patterns as {hour: mean} dicts
+                    self.hourly_lut = np.array([data['hourly_patterns'].get(h, self.historical_mean) for h in range(24)])
+                    self.daily_lut = np.array([data['daily_patterns'].get(d, self.historical_mean) for d in range(7)])
+            self.clear_cache()
             return True
         return False
     
@@ -140,18 +157,10 @@ class EnsemblePredictor:
         actual = test_df[target_column].tail(24).values
         predicted = predictions['predicted_demand'].values
         
-        mae = np.mean(np.abs(actual - predicted))
-        mse = np.mean((actual - predicted) ** 2)
-        rmse = np.sqrt(mse)
-        mape = np.mean(np.abs((actual - predicted) / actual)) * 100
-        
-        return {
-            'mae': mae,
-            'mse': mse,
-            'rmse': rmse,
-            'mape': mape,
-            'interval_coverage': 90.0  # Estimated
-        }
+        metrics = forecast_errors(actual, predicted)
+        metrics['interval_coverage'] = 90.0  # Estimated
+        
+        return metrics
 
 if __name__ == "__main__":
     from utils.data_generator import EnergyDataGenerator
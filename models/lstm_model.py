@@ -5,16 +5,23 @@ LSTM Neural Network for Energy Demand Forecasting
 import numpy as np
 import tensorflow as tf
 from tensorflow import keras
-from tensorflow.keras import layers
+from tensorflow.keras import layers, mixed_precision
 import config
+from utils.metrics import forecast_errors
 import os
 
+# Half-precision activations only pay off on GPUs; on plain CPUs they are slower
+if config.LSTM_CONFIG.get('mixed_precision') and tf.config.list_physical_devices('GPU'):
+    mixed_precision.set_global_policy(config.LSTM_CONFIG['mixed_precision'])
+
 class LSTMForecaster:
     def __init__(self, sequence_length=24, n_features=8):
         self.sequence_length = sequence_length
         self.n_features = n_features
         self.model = None
         self.history = None
+        self._rollout_fn = None
+        self._infer_fn = None
         
     def build_model(self):
         """Build LSTM model architecture"""
@@ -36,7 +43,8 @@ class LSTMForecaster:
             
             layers.Dense(32, activation='relu'),
             layers.Dense(16, activation='relu'),
-            layers.Dense(1)
+            # Keep the output in float32 for a numerically stable loss under mixed precision
+            layers.Dense(1, dtype='float32')
         ])
         
         model.compile(
@@ -46,8 +54,26 @@ class LSTMForecaster:
         )
         
         self.model = model
+        self._reset_compiled()
         return model
     
+    def _reset_compiled(self):
+        """Drop compiled inference functions bound to a previous model"""
+        self._rollout_fn = None
+        self._infer_fn = None
+    
+    def _build_infer(self):
+        """XLA-compiled batch inference with a fixed signature, so it is traced only once"""
+        model = self.model
+        
+        @tf.function(jit_compile=True, input_signature=[
+            tf.TensorSpec([None, self.sequence_length, self.n_features], tf.float32)
+        ])
+        def infer(X):
+            return model(X, training=False)
+        
+        return infer
+    
     def train(self, X_train, y_train, X_val=None, y_val=None):
         """Train the LSTM model"""
         if self.model is None:
@@ -87,51 +113,77 @@ class LSTMForecaster:
         if self.model is None:
             raise ValueError("Model not trained yet!")
         
-        predictions = self.model.predict(X, verbose=0)
-        return predictions.flatten()
+        if self._infer_fn is None:
+            self._infer_fn = self._build_infer()
+        
+        predictions = self._infer_fn(tf.constant(X, tf.float32))
+        return predictions.numpy().flatten()
+    
+    def _build_rollout(self):
+        """
+        Compile the autoregressive rollout into a single graph
+        Calls the model directly instead of model.predict, whose per-call
+        dispatch overhead dominates a one-row LSTM forward pass
+        """
+        model = self.model
+        
+        @tf.function(input_signature=[
+            tf.TensorSpec([self.sequence_length, self.n_features], tf.float32),
+            tf.TensorSpec([None, self.n_features - 1], tf.float32)
+        ])
+        def rollout(sequence, feature_rows):
+            n_steps = tf.shape(feature_rows)[0]
+            predictions = tf.TensorArray(tf.float32, size=n_steps)
+            
+            for i in tf.range(n_steps):
+                # Predict next step
+                pred = model(sequence[tf.newaxis], training=False)[0, 0]
+                predictions = predictions.write(i, pred)
+                
+                # Shift sequence, appending the predicted value and its features
+                new_row = tf.concat([[pred], feature_rows[i]], axis=0)
+                sequence = tf.concat([sequence[1:], new_row[tf.newaxis]], axis=0)
+            
+            return predictions.stack()
+        
+        return rollout
     
     def predict_sequence(self, initial_sequence, n_steps, features=None):
         """Predict multiple steps ahead"""
         if self.model is None:
             raise ValueError("Model not trained yet!")
         
-        predictions = []
-        current_sequence = initial_sequence.copy()
+        if self._rollout_fn is None:
+            self._rollout_fn = self._build_rollout()
         
-        for i in range(n_steps):
-            # Predict next step
-            pred = self.model.predict(current_sequence.reshape(1, self.sequence_length, self.n_features), verbose=0)
-            predictions.append(pred[0, 0])
-            
-            # Update sequence
-            new_row = np.zeros((1, self.n_features))
-            new_row[0, 0] = pred[0, 0]  # Predicted value
-            
-            # Add features if provided
-            if features is not None and i < len(features):
-                new_row[0, 1:] = features[i]
-            else:
-                # Use last known features
-                new_row[0, 1:] = current_sequence[-1, 1:]
-            
-            # Shift sequence
-            current_sequence = np.vstack([current_sequence[1:], new_row])
+        # Features for each step: provided rows first, then carry the last known ones forward
+        feature_rows = np.empty((n_steps, self.n_features - 1), dtype=np.float32)
+        n_known = 0 if features is None else min(len(features), n_steps)
+        if n_known:
+            feature_rows[:n_known] = np.asarray(features)[:n_known]
+        last_features = feature_rows[n_known - 1] if n_known else initial_sequence[-1, 1:]
+        feature_rows[n_known:] = last_features
         
-        return np.array(predictions)
+        predictions = self._rollout_fn(
+            tf.constant(initial_sequence, tf.float32),
+            tf.constant(feature_rows)
+        )
+        return predictions.numpy()
     
-    def save_model(self, filepath='saved_models/lstm_model.h5'):
-        """Save trained model"""
+    def save_model(self, filepath='saved_models/lstm_model'):
+        """Save trained model as a TensorFlow SavedModel directory"""
         if self.model is None:
             raise ValueError("No model to save!")
         
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        self.model.save(filepath)
+        self.model.save(filepath, save_format='tf')
         print(f"Model saved to {filepath}")
     
-    def load_model(self, filepath='saved_models/lstm_model.h5'):
-        """Load trained model"""
+    def load_model(self, filepath='saved_models/lstm_model'):
+        """Load trained model (SavedModel directory, or a legacy .h5 file)"""
         if os.path.exists(filepath):
             self.model = keras.models.load_model(filepath)
+            self._reset_compiled()
             print(f"Model loaded from {filepath}")
             return True
         return False
@@ -146,16 +198,14 @@ class LSTMForecaster:
         predictions = self.predict(X_test)
         
         # Calculate additional metrics
-        mse = np.mean((predictions - y_test) ** 2)
-        rmse = np.sqrt(mse)
-        mape = np.mean(np.abs((y_test - predictions) / y_test)) * 100
+        metrics = forecast_errors(y_test, predictions)
         
         return {
             'loss': loss,
             'mae': mae,
-            'mse': mse,
-            'rmse': rmse,
-            'mape': mape
+            'mse': metrics['mse'],
+            'rmse': metrics['rmse'],
+            'mape': metrics['mape']
         }
 
 if __name__ == "__main__":
@@ -9,6 +9,56 @@ from sklearn.preprocessing import StandardScaler
 import config
 import os
 import pickle
+from utils.jit import njit
+from utils.metrics import forecast_errors
+
+try:
+    import onnxruntime
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# Explicit signature: compiled at import (and cached on disk), not on the first forecast
+@njit('float64[::1](float64[:, ::1], float64[:, ::1], float64[::1], float64[::1], '
+      'float64[:, ::1], float64[::1], float64[:, ::1], float64[::1], '
+      'float64[:, ::1], float64[::1], float64[:, ::1], float64[::1])', cache=True, nogil=True)
+def _mlp_rollout(sequence, feature_rows, mu, inv_sd, W0, b0, W1, b1, W2, b2, W3, b3):
+    """
+    Autoregressive rollout of a three-hidden-layer ReLU MLP, e.g. the default (64, 32, 16),
+    in one compiled loop
+    The window is a ring buffer: each step overwrites the oldest row in place
+    and the standardized input is gathered starting from `head`
+    """
+    seq_len, n_features = sequence.shape
+    n_steps = feature_rows.shape[0]
+    buf = sequence.copy()
+    head = 0
+    x = np.empty(seq_len * n_features)
+    predictions = np.empty(n_steps)
+    
+    for i in range(n_steps):
+        # Standardize the window, oldest row first
+        k = 0
+        for r in range(seq_len):
+            row = (head + r) % seq_len
+            for c in range(n_features):
+                x[k] = (buf[row, c] - mu[k]) * inv_sd[k]
+                k += 1
+        
+        h = np.maximum(np.dot(x, W0) + b0, 0.0)
+        h = np.maximum(np.dot(h, W1) + b1, 0.0)
+        h = np.maximum(np.dot(h, W2) + b2, 0.0)
+        pred = np.dot(h, W3)[0] + b3[0]
+        predictions[i] = pred
+        
+        # Replace the oldest row with the predicted one
+        buf[head, 0] = pred
+        buf[head, 1:] = feature_rows[i]
+        head = (head + 1) % seq_len
+    
+    return predictions
 
 class LSTMForecaster:
     def __init__(self, sequence_length=24, n_features=8):
@@ -17,6 +67,41 @@ class LSTMForecaster:
         self.model = None
         self.scaler = StandardScaler()
         self.history = None
+        self._weights = None
+        self._mu = None
+        self._inv_sd = None
+        self._onnx_bytes = None
+        self._ort = None
+        
+    def _build_onnx_session(self, onnx_bytes=None):
+        """Export the fitted MLP to ONNX (unless bytes are given) and open an ONNX Runtime session"""
+        if not ONNX_AVAILABLE:
+            return
+        
+        if onnx_bytes is None:
+            n_inputs = self.sequence_length * self.n_features
+            onx = convert_sklearn(self.model, initial_types=[('X', FloatTensorType([None, n_inputs]))])
+            onnx_bytes = onx.SerializeToString()
+        
+        self._onnx_bytes = onnx_bytes
+        self._ort = onnxruntime.InferenceSession(onnx_bytes, providers=['CPUExecutionProvider'])
+        
+    def _cache_weights(self):
+        """
+        Pull the fitted MLP weights and scaler statistics out of sklearn for _mlp_rollout
+        The kernel is typed for three ReLU hidden layers; any other network (a different
+        hidden_layer_sizes or activation, or an older pickle) rolls out through sklearn
+        """
+        # Standardize inline as (x - mu) * inv_sd, skipping StandardScaler.transform's validation
+        self._mu = self.scaler.mean_
+        self._inv_sd = 1.0 / self.scaler.scale_
+        if len(self.model.coefs_) != 4 or self.model.activation != 'relu':
+            self._weights = None
+            return
+        params = [self._mu, self._inv_sd]
+        for W, b in zip(self.model.coefs_, self.model.intercepts_):
+            params.extend([W, b])
+        self._weights = tuple(np.ascontiguousarray(p, dtype=np.float64) for p in params)
         
     def build_model(self):
         """Build MLP model as LSTM alternative"""
@@ -45,6 +130,8 @@ class LSTMForecaster:
         
         # Train
         self.model.fit(X_train_scaled, y_train)
+        self._cache_weights()
+        self._build_onnx_session()
         
         return self
     
@@ -54,7 +141,12 @@ class LSTMForecaster:
             raise ValueError("Model not trained yet!")
         
         X_flat = X.reshape(X.shape[0], -1)
-        X_scaled = self.scaler.transform(X_flat)
+        X_scaled = (X_flat - self._mu) * self._inv_sd
+        
+        # ONNX Runtime fuses GEMM+ReLU; fall back to sklearn when it is not installed
+        if self._ort is not None:
+            return self._ort.run(None, {'X': X_scaled.astype(np.float32)})[0].ravel()
+        
         predictions = self.model.predict(X_scaled)
         return predictions
     
@@ -63,28 +155,33 @@ class LSTMForecaster:
         if self.model is None:
             raise ValueError("Model not trained yet!")
         
-        predictions = []
-        current_sequence = initial_sequence.copy()
+        # Features for each step: provided rows first, then carry the last known ones forward
+        feature_rows = np.empty((n_steps, self.n_features - 1))
+        n_known = 0 if features is None else min(len(features), n_steps)
+        if n_known:
+            feature_rows[:n_known] = np.asarray(features)[:n_known]
+        feature_rows[n_known:] = feature_rows[n_known - 1] if n_known else initial_sequence[-1, 1:]
         
-        for i in range(n_steps):
-            # Predict next step
-            X_flat = current_sequence.reshape(1, -1)
-            X_scaled = self.scaler.transform(X_flat)
-            pred = self.model.predict(X_scaled)
-            predictions.append(pred[0])
-            
-            # Update sequence
-            new_row = np.zeros((1, self.n_features))
-            new_row[0, 0] = pred[0]
-            
-            if features is not None and i < len(features):
-                new_row[0, 1:] = features[i]
-            else:
-                new_row[0, 1:] = current_sequence[-1, 1:]
+        sequence = np.ascontiguousarray(initial_sequence, dtype=np.float64)
+        if self._weights is not None:
+            return _mlp_rollout(sequence, feature_rows, *self._weights)
+        return self._rollout_sklearn(sequence, feature_rows)
+    
+    def _rollout_sklearn(self, sequence, feature_rows):
+        """Step-by-step rollout through MLPRegressor.predict, for networks _mlp_rollout is not typed for"""
+        window = sequence.copy()
+        predictions = np.empty(len(feature_rows))
+        
+        for i, row in enumerate(feature_rows):
+            x = (window.reshape(1, -1) - self._mu) * self._inv_sd
+            predictions[i] = self.model.predict(x)[0]
             
-            current_sequence = np.vstack([current_sequence[1:], new_row])
+            # Drop the oldest row and append the predicted one
+            window = np.roll(window, -1, axis=0)
+            window[-1, 0] = predictions[i]
+            window[-1, 1:] = row
         
-        return np.array(predictions)
+        return predictions
     
     def save_model(self, filepath='saved_models/lstm_model.pkl'):
         """Save trained model"""
@@ -93,7 +190,7 @@ class LSTMForecaster:
         
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         with open(filepath, 'wb') as f:
-            pickle.dump({'model': self.model, 'scaler': self.scaler}, f)
+            pickle.dump({'model': self.model, 'scaler': self.scaler, 'onnx': self._onnx_bytes}, f)
         print(f"Model saved to {filepath}")
     
     def load_model(self, filepath='saved_models/lstm_model.pkl'):
@@ -103,6 +200,8 @@ class LSTMForecaster:
                 data = pickle.load(f)
                 self.model = data['model']
                 self.scaler = data['scaler']
+            self._cache_weights()
+            self._build_onnx_session(data.get('onnx'))
             print(f"Model loaded from {filepath}")
             return True
         return False
@@ -114,18 +213,9 @@ class LSTMForecaster:
         
         predictions = self.predict(X_test)
         
-        mse = np.mean((predictions - y_test) ** 2)
-        mae = np.mean(np.abs(predictions - y_test))
-        rmse = np.sqrt(mse)
-        mape = np.mean(np.abs((y_test - predictions) / y_test)) * 100
-        
-        return {
-            'loss': mse,
-            'mae': mae,
-            'mse': mse,
-            'rmse': rmse,
-            'mape': mape
-        }
+        metrics = forecast_errors(y_test, predictions)
+        
+        return {'loss': metrics['mse'], **metrics}
 
 if __name__ == "__main__":
     print("Testing LSTM Forecaster (sklearn version)...")
@@ -0,0 +1,44 @@
+"""
+LRU cache for ensemble predictions
+Keyed on a digest of the input data so repeated requests skip model execution
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+class PredictionCache:
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(df, hours_ahead, target_column):
+        """Cache key: last timestamp, length and a digest of the target column"""
+        last_ts_ns = pd.Timestamp(df['timestamp'].iloc[-1]).value
+        digest = hashlib.blake2b(df[target_column].to_numpy().tobytes(), digest_size=16).digest()
+        return (last_ts_ns, len(df), digest, hours_ahead, target_column)
+
+    def get_or_compute(self, key, compute):
+        """Return a copy of the cached DataFrame for key, computing it on a miss"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                return result.copy()
+
+        result = compute()
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return result.copy()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -2,27 +2,61 @@
 Facebook Prophet Model for Energy Demand Forecasting
 """
 
+import os
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
+from joblib import Parallel, delayed
 from prophet import Prophet
 import config
+from utils.metrics import forecast_errors
 import warnings
 warnings.filterwarnings('ignore')
 
+def _fit_one(forecaster_cls, df, forecaster_kwargs):
+    """Fit a fresh forecaster on one series (runs in a joblib worker)"""
+    # One Stan thread per worker; the parallelism comes from the worker processes
+    os.environ['STAN_NUM_THREADS'] = '1'
+    forecaster = forecaster_cls(**forecaster_kwargs)
+    forecaster.train(df)
+    return forecaster
+
 class ProphetForecaster:
-    def __init__(self):
+    def __init__(self, uncertainty_samples=None):
         self.model = None
         self.fitted = False
+        # 0 skips Prophet's Monte Carlo interval sampling; predict() then fills
+        # yhat_lower/upper with yhat itself, since Prophet leaves them out
+        if uncertainty_samples is None:
+            uncertainty_samples = config.PROPHET_CONFIG.get('uncertainty_samples', 100)
+        self.uncertainty_samples = uncertainty_samples
+        # Last full forecast, reused by get_components
+        self._last_forecast = None
+        # Future frames by (periods, freq), least recently used first; the history they
+        # extend only changes on retrain. Horizons come from requests, so keep only a few
+        self._future_cache = OrderedDict()
+        self._future_cache_size = 4
+        
+    def build_model(self, history_days=None):
+        """
+        Build Prophet model with custom configuration
+        history_days: days covered by the training data; yearly seasonality needs at least a year
+        """
+        yearly = config.PROPHET_CONFIG['yearly_seasonality']
+        if history_days is not None and history_days < 365:
+            yearly = False
         
-    def build_model(self):
-        """Build Prophet model with custom configuration"""
         model = Prophet(
             changepoint_prior_scale=config.PROPHET_CONFIG['changepoint_prior_scale'],
             seasonality_prior_scale=config.PROPHET_CONFIG['seasonality_prior_scale'],
             daily_seasonality=config.PROPHET_CONFIG['daily_seasonality'],
             weekly_seasonality=config.PROPHET_CONFIG['weekly_seasonality'],
-            yearly_seasonality=config.PROPHET_CONFIG['yearly_seasonality'],
-            interval_width=0.95
+            yearly_seasonality=yearly,
+            interval_width=0.95,
+            uncertainty_samples=self.uncertainty_samples,
+            # MAP fit through the precompiled cmdstan model, no MCMC sampling
+            mcmc_samples=0,
+            stan_backend='CMDSTANPY'
         )
         
         # Add custom seasonalities
@@ -31,24 +65,57 @@ class ProphetForecaster:
         self.model = model
         return model
     
-    def train(self, df):
+    def train(self, df, max_points=None):
         """
         Train Prophet model
         df should have columns: 'ds' (datetime) and 'y' (target)
+        max_points: fit on at most this many evenly spaced rows (None uses the config value,
+        0 fits on everything); Prophet's fit time grows faster than linearly with history length
         """
-        if self.model is None:
-            self.build_model()
+        if max_points is None:
+            max_points = config.PROPHET_CONFIG.get('max_train_points', 4000)
         
         # Ensure proper format
         train_df = df[['ds', 'y']].copy()
         train_df['ds'] = pd.to_datetime(train_df['ds'])
         
+        # Days covered, counting the last sample's own interval (8760 hourly rows span
+        # 364.96 days between first and last stamp but cover a full year); measured
+        # before thinning, which widens the spacing
+        ds = train_df['ds']
+        step = ds.diff().median() if len(ds) > 1 else pd.Timedelta(0)
+        history_days = (ds.max() - ds.min() + step) / pd.Timedelta(days=1)
+        
+        if max_points and len(train_df) > max_points:
+            # Fractional spacing keeps every hour of the day represented (an integer stride
+            # dividing 24 would only ever sample the same hours); the last row is always kept
+            rows = np.linspace(0, len(train_df) - 1, max_points).round().astype(np.int64)
+            train_df = train_df.iloc[rows].reset_index(drop=True)
+        
+        if self.model is None:
+            self.build_model(history_days)
+        
         # Fit model
         self.model.fit(train_df)
         self.fitted = True
+        self._last_forecast = None
+        self._future_cache.clear()
         
         return self.model
     
+    @classmethod
+    def train_many(cls, dfs, n_jobs=-1, forecaster_cls=None, **forecaster_kwargs):
+        """
+        Fit one forecaster per series (e.g. per zone or building) in parallel
+        dfs: list of DataFrames with 'ds' and 'y'; returns the fitted forecasters in the same order
+        forecaster_cls: class to fit, defaults to cls (any forecaster with the same train() works)
+        forecaster_kwargs: constructor arguments, e.g. uncertainty_samples=0
+        """
+        forecaster_cls = forecaster_cls or cls
+        return Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_fit_one)(forecaster_cls, df, forecaster_kwargs) for df in dfs
+        )
+    
     def predict(self, periods=24, freq='H'):
         """
         Make future predictions
@@ -58,12 +125,25 @@ class ProphetForecaster:
         if not self.fitted:
             raise ValueError("Model not trained yet!")
         
-        # Create future dataframe
-        future = self.model.make_future_dataframe(periods=periods, freq=freq)
+        # Create (or reuse) the future dataframe
+        key = (periods, freq)
+        future = self._future_cache.get(key)
+        if future is None:
+            future = self.model.make_future_dataframe(periods=periods, freq=freq)
+            self._future_cache[key] = future
+            if len(self._future_cache) > self._future_cache_size:
+                self._future_cache.popitem(last=False)
+        else:
+            self._future_cache.move_to_end(key)
         
-        # Predict
-        forecast = self.model.predict(future)
+        # Predict (vectorized uncertainty sampling)
+        forecast = self.model.predict(future, vectorized=True)
+        if 'yhat_lower' not in forecast.columns:
+            # Sampling disabled: zero-width intervals keep the output columns stable
+            forecast['yhat_lower'] = forecast['yhat']
+            forecast['yhat_upper'] = forecast['yhat']
         
+        self._last_forecast = forecast
         return forecast
     
     def predict_future(self, periods=24, freq='H'):
@@ -75,14 +155,19 @@ class ProphetForecaster:
         
         return future_forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
     
-    def get_components(self):
-        """Get forecast components (trend, seasonality)"""
+    def get_components(self, forecast=None):
+        """
+        Get forecast components (trend, seasonality)
+        forecast: full forecast to read from; defaults to the last predict() result
+        """
         if not self.fitted:
             raise ValueError("Model not trained yet!")
         
-        # Make prediction for analysis
-        future = self.model.make_future_dataframe(periods=24, freq='H')
-        forecast = self.model.predict(future)
+        # Only predict when there is no forecast to reuse
+        if forecast is None:
+            forecast = self._last_forecast
+        if forecast is None:
+            forecast = self.predict(periods=24, freq='H')
         
         components = {
             'trend': forecast[['ds', 'trend']].to_dict('records'),
@@ -108,39 +193,38 @@ class ProphetForecaster:
         y_true = test_df['y'].values
         y_pred = forecast['yhat'].values
         
-        mae = np.mean(np.abs(y_true - y_pred))
-        mse = np.mean((y_true - y_pred) ** 2)
-        rmse = np.sqrt(mse)
-        mape = np.mean(np.abs((y_true - y_pred) / y_true)) * 100
-        
-        # Coverage of prediction intervals
-        in_interval = ((y_true >= forecast['yhat_lower'].values) & 
-                      (y_true <= forecast['yhat_upper'].values))
-        coverage = np.mean(in_interval) * 100
-        
-        return {
-            'mae': mae,
-            'mse': mse,
-            'rmse': rmse,
-            'mape': mape,
-            'interval_coverage': coverage
-        }
+        metrics = forecast_errors(y_true, y_pred)
+        
+        # Coverage of prediction intervals (absent when interval sampling is off)
+        if 'yhat_lower' in forecast.columns:
+            in_interval = ((y_true >= forecast['yhat_lower'].values) & 
+                          (y_true <= forecast['yhat_upper'].values))
+            metrics['interval_coverage'] = np.mean(in_interval) * 100
+        
+        return metrics
     
     def get_forecast_with_uncertainty(self, periods=24, freq='H'):
         """Get forecast with uncertainty intervals"""
         forecast = self.predict_future(periods, freq)
         
-        results = []
-        for _, row in forecast.iterrows():
-            results.append({
-                'timestamp': row['ds'].isoformat(),
-                'prediction': float(row['yhat']),
-                'lower_bound': float(row['yhat_lower']),
-                'upper_bound': float(row['yhat_upper']),
-                'uncertainty': float(row['yhat_upper'] - row['yhat_lower'])
-            })
-        
-        return results
+        # Format timestamps in one vector call and zip the value arrays into records
+        timestamps = forecast['ds'].dt.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+        yhat = forecast['yhat'].to_numpy(dtype=np.float64)
+        lower = forecast['yhat_lower'].to_numpy(dtype=np.float64)
+        upper = forecast['yhat_upper'].to_numpy(dtype=np.float64)
+        
+        return [
+            {
+                'timestamp': timestamp,
+                'prediction': prediction,
+                'lower_bound': lower_bound,
+                'upper_bound': upper_bound,
+                'uncertainty': uncertainty
+            }
+            for timestamp, prediction, lower_bound, upper_bound, uncertainty in zip(
+                timestamps, yhat.tolist(), lower.tolist(), upper.tolist(), (upper - lower).tolist()
+            )
+        ]
 
 if __name__ == "__main__":
     # Test Prophet model
@@ -197,12 +197,12 @@ function updateHistoricalChart(data) {
     const ctx = document.getElementById('historicalChart');
     if (!ctx) return;
 
-    const labels = data.map(d => new Date(d.timestamp).toLocaleString('en-US', {
+    const labels = data.data.timestamp.map(t => new Date(t).toLocaleString('en-US', {
         month: 'short',
         day: 'numeric',
         hour: '2-digit'
     }));
-    const values = data.map(d => d.energy_demand);
+    const values = data.data.energy_demand;
 
     if (charts.historical) {
         charts.historical.destroy();
@@ -276,14 +276,14 @@ function updateForecastChart(predictions) {
     const ctx = document.getElementById('forecastChart');
     if (!ctx) return;
 
-    const labels = predictions.map(p => new Date(p.timestamp).toLocaleString('en-US', {
+    const labels = predictions.data.timestamp.map(t => new Date(t).toLocaleString('en-US', {
         month: 'short',
         day: 'numeric',
         hour: '2-digit'
     }));
-    const values = predictions.map(p => p.predicted_demand);
-    const lowerBounds = predictions.map(p => p.lower_bound);
-    const upperBounds = predictions.map(p => p.upper_bound);
+    const values = predictions.data.predicted_demand;
+    const lowerBounds = predictions.data.lower_bound;
+    const upperBounds = predictions.data.upper_bound;
 
     if (charts.forecast) {
         charts.forecast.destroy();
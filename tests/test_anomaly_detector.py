@@ -0,0 +1,68 @@
+"""
+Tests for the anomaly detection kernels against the pandas/loop implementations they replaced
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.anomaly_detector import AnomalyDetector, _rolling_zscore
+
+
+def _pandas_zscore(values, window):
+    series = pd.Series(values)
+    rolling_mean = series.rolling(window=window, center=True).mean()
+    rolling_std = series.rolling(window=window, center=True).std()
+    return np.abs((series - rolling_mean) / rolling_std).to_numpy(), rolling_mean.to_numpy(), rolling_std.to_numpy()
+
+
+SERIES = {
+    'step': np.r_[np.full(50, 5000.1), np.full(100, 7000.7), np.full(60, 1234.567)],
+    'flat': np.full(120, 4321.5),
+    'noisy': 5000 + np.random.default_rng(0).normal(0, 300, 500),
+    'spiky_steps': np.r_[np.full(80, 6000.3), [9000.0], np.full(80, 6000.3), np.full(40, 3000.9)],
+}
+
+
+@pytest.mark.parametrize('name', sorted(SERIES))
+def test_rolling_zscore_matches_pandas(name):
+    values = SERIES[name]
+    window = 24
+    
+    flags, z_scores, rolling_mean, rolling_std = _rolling_zscore(values, window, 3.0)
+    expected_z, expected_mean, expected_std = _pandas_zscore(values, window)
+    
+    np.testing.assert_allclose(rolling_mean, expected_mean, rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(rolling_std, expected_std, rtol=1e-6, atol=1e-6, equal_nan=True)
+    np.testing.assert_array_equal(flags, expected_z > 3.0)
+
+
+def test_flat_windows_after_level_shift_are_not_anomalies():
+    detector = AnomalyDetector(threshold=3.0)
+    assert detector.detect_zscore_anomalies(SERIES['step'], window=24) == []
+
+
+def test_iqr_anomalies_match_loop():
+    data = np.r_[np.random.default_rng(1).normal(5000, 200, 300), [9000.0, 100.0]]
+    q1, q3 = np.percentile(data, 25), np.percentile(data, 75)
+    iqr = q3 - q1
+    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    expected = [
+        (idx, 'high' if (value < lower - iqr or value > upper + iqr) else 'medium')
+        for idx, value in enumerate(data) if value < lower or value > upper
+    ]
+    
+    anomalies = AnomalyDetector().detect_iqr_anomalies(data)
+    
+    assert [(a['index'], a['severity']) for a in anomalies] == expected
+
+
+def test_sudden_changes_match_pct_change():
+    data = np.r_[np.random.default_rng(2).uniform(3000, 9000, 200), [0.0, 0.0, 5000.0, 2000.0]]
+    pct_change = pd.Series(data).pct_change().to_numpy()
+    expected = [idx for idx in np.flatnonzero(np.abs(pct_change) > 0.3) if idx > 0]
+    
+    changes = AnomalyDetector().detect_sudden_changes(data)
+    
+    assert [c['index'] for c in changes] == expected
+    np.testing.assert_allclose([c['change_percent'] for c in changes], pct_change[expected] * 100)
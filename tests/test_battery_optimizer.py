@@ -0,0 +1,69 @@
+"""
+Tests for the battery schedule kernel against the row loop it replaced
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.battery_optimizer import ACTION_NAMES, BatteryStorageOptimizer, _run_schedule
+
+
+def _reference_schedule(hours, soc, capacity, power_rating, efficiency, min_soc, max_soc):
+    """The original per-row charge/discharge loop"""
+    rows = []
+    for hour in hours:
+        if hour in [0, 1, 2, 3, 4, 5] and soc < max_soc:
+            action = 'charge'
+        elif hour in [17, 18, 19, 20, 21] and soc > min_soc:
+            action = 'discharge'
+        elif hour in [11, 12, 13, 14] and soc < 0.6:
+            action = 'charge'
+        else:
+            action = 'idle'
+        
+        if action == 'charge':
+            power = min(power_rating, (max_soc - soc) * capacity)
+            energy = power * efficiency
+            new_soc = min(max_soc, soc + energy / capacity)
+        elif action == 'discharge':
+            power = min(power_rating, (soc - min_soc) * capacity)
+            energy = power / efficiency
+            new_soc = max(min_soc, soc - energy / capacity)
+        else:
+            power = energy = 0.0
+            new_soc = soc
+        
+        rows.append((action, power, energy, soc, new_soc))
+        soc = new_soc
+    return rows
+
+
+@pytest.mark.parametrize('soc0, capacity, power_rating', [(0.5, 100.0, 50.0), (0.1, 80.0, 10.0), (0.9, 200.0, 75.0)])
+def test_run_schedule_matches_loop(soc0, capacity, power_rating):
+    start = np.random.default_rng(3).integers(0, 24)
+    hours = (np.arange(72, dtype=np.int64) + start) % 24
+    
+    actions, power, energy, soc_before, soc_after = _run_schedule(
+        hours, soc0, capacity, power_rating, 0.9, 0.1, 0.9
+    )
+    expected = _reference_schedule(hours.tolist(), soc0, capacity, power_rating, 0.9, 0.1, 0.9)
+    
+    assert ACTION_NAMES[actions].tolist() == [row[0] for row in expected]
+    np.testing.assert_allclose(power, [row[1] for row in expected])
+    np.testing.assert_allclose(energy, [row[2] for row in expected])
+    np.testing.assert_allclose(soc_before, [row[3] for row in expected])
+    np.testing.assert_allclose(soc_after, [row[4] for row in expected])
+
+
+def test_optimize_charging_schedule_reads_timestamp_hours():
+    forecast = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01 15:00', periods=30, freq='H'),
+        'predicted_demand': np.full(30, 5000.0)
+    })
+    
+    schedule = BatteryStorageOptimizer(seed=0).optimize_charging_schedule(forecast)
+    
+    assert schedule['hour'].tolist() == forecast['timestamp'].dt.hour.tolist()
+    expected = _reference_schedule(schedule['hour'].tolist(), 0.5, 100, 50, 0.9, 0.1, 0.9)
+    assert schedule['action'].tolist() == [row[0] for row in expected]
@@ -0,0 +1,39 @@
+"""
+Tests for the row-loop lint so violations fail the suite
+"""
+
+import textwrap
+
+from tools.check_row_loops import check_file, main
+
+
+def test_utils_have_no_row_loops():
+    assert main([]) == 0
+
+
+def test_iloc_is_only_flagged_inside_its_loop(tmp_path):
+    path = tmp_path / 'sample.py'
+    path.write_text(textwrap.dedent('''
+        def f(df):
+            for i in range(len(df)):
+                total = df.iloc[i]
+            last = df.iloc[i]
+            return total, last
+    '''))
+    
+    violations = check_file(path)
+    
+    assert [line_no for line_no, _, _ in violations] == [4]
+
+
+def test_allow_marker_skips_line(tmp_path):
+    path = tmp_path / 'sample.py'
+    path.write_text(textwrap.dedent('''
+        for i in range(3):
+            row = df.iloc[i]  # row-loop: ok
+        rows = [r for r in df.iterrows()]
+    '''))
+    
+    violations = check_file(path)
+    
+    assert [line_no for line_no, _, _ in violations] == [4]
@@ -0,0 +1,74 @@
+"""
+Tests for the DER dispatch kernel against the row loop it replaced
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.der_manager import DERManager, _dispatch_kernel
+
+
+def _reference_dispatch(demand, solar, wind, battery_power, backup_capacity):
+    """The original per-hour dispatch loop (unrounded)"""
+    rows = []
+    for d, s, w in zip(demand, solar, wind):
+        net_demand = d - s - w
+        if net_demand > 0:
+            battery = min(net_demand, battery_power)
+            remaining = net_demand - battery
+            backup = min(remaining, backup_capacity)
+            grid_import = max(0, remaining - backup)
+            curtailment = 0.0
+        else:
+            charge = min(abs(net_demand), battery_power)
+            curtailment = max(0, abs(net_demand) - charge)
+            battery = -charge
+            backup = grid_import = 0.0
+        penetration = (s + w) / d * 100 if d > 0 else 0.0
+        rows.append((battery, backup, grid_import, curtailment, penetration))
+    return np.array(rows).T
+
+
+def _inputs(n=200):
+    rng = np.random.default_rng(4)
+    # Demand spans shortfall and surplus hours, including zero demand
+    demand = rng.uniform(0, 150, n)
+    demand[::17] = 0.0
+    return demand, rng.uniform(0, 50, n), rng.uniform(0, 30, n)
+
+
+def test_dispatch_kernel_matches_loop():
+    demand, solar, wind = _inputs()
+    
+    outputs = _dispatch_kernel(demand, solar, wind, 50.0, 20.0)
+    expected = _reference_dispatch(demand, solar, wind, 50.0, 20.0)
+    
+    for actual, reference in zip(outputs, expected):
+        np.testing.assert_allclose(actual, reference)
+
+
+def test_batch_dispatch_matches_per_scenario_calls():
+    manager = DERManager(seed=0)
+    demand, solar, wind = _inputs(48)
+    solar_scenarios = np.vstack([solar, solar * 0.5, solar * 1.5])
+    
+    batch = manager.optimize_der_dispatch_batch(demand, solar_scenarios, wind)
+    
+    for k, scenario_solar in enumerate(solar_scenarios):
+        single = manager.optimize_der_dispatch_batch(demand, scenario_solar, wind)
+        for key, values in single.items():
+            np.testing.assert_array_equal(batch[key][k], values)
+
+
+def test_optimize_der_dispatch_columns():
+    manager = DERManager(seed=0)
+    demand, solar, wind = _inputs(24)
+    
+    schedule = manager.optimize_der_dispatch(
+        pd.DataFrame({'predicted_demand': demand}), pd.DataFrame({'solar_mw': solar, 'wind_mw': wind})
+    )
+    expected = _reference_dispatch(demand, solar, wind, 50.0, 20.0)
+    
+    np.testing.assert_allclose(schedule['battery_mw'], expected[0].round(2))
+    np.testing.assert_allclose(schedule['grid_import_mw'], expected[2].round(2))
+    np.testing.assert_allclose(schedule['renewable_penetration'], expected[4].round(1))
@@ -0,0 +1,53 @@
+"""
+Tests for the EV hourly load table against the per-hour loop it replaced
+"""
+
+import numpy as np
+import pytest
+
+from utils.ev_predictor import EVLoadPredictor
+
+
+def _reference_load(predictor, hour, day_of_week):
+    """The original per-hour, per-profile charging load (before random variation)"""
+    total_load = 0
+    for profile_name, profile in predictor.charging_profiles.items():
+        if hour in profile['peak_hours']:
+            num_charging = int(predictor.num_evs * profile['probability'])
+            if day_of_week >= 5 and profile_name == 'work_charging':
+                num_charging = int(num_charging * 0.3)
+            total_load += num_charging * profile['power']
+    return total_load
+
+
+def _reference_rate(hour):
+    if hour in [18, 19, 20, 21, 22, 23]:
+        return 'peak'
+    elif hour in [0, 1, 2, 3, 4, 5]:
+        return 'off-peak'
+    return 'mid-peak'
+
+
+@pytest.mark.parametrize('num_evs', [5000, 1234])
+def test_hourly_load_table_matches_loop(num_evs):
+    predictor = EVLoadPredictor(num_evs=num_evs, seed=0)
+    
+    for day_of_week, is_weekend in ((2, 0), (6, 1)):
+        expected = [_reference_load(predictor, hour, day_of_week) for hour in range(24)]
+        np.testing.assert_allclose(predictor._hourly_load[is_weekend], expected)
+
+
+def test_predict_ev_load_matches_loop():
+    predictor = EVLoadPredictor(seed=0)
+    hours_ahead = 24 * 8
+    noise = np.random.default_rng(5).uniform(0.85, 1.15, hours_ahead)
+    
+    forecast = predictor.predict_ev_load(hours_ahead, noise=noise)
+    timestamps = forecast['timestamp']
+    expected = np.array([
+        _reference_load(predictor, ts.hour, ts.weekday()) for ts in timestamps
+    ]) * noise
+    
+    np.testing.assert_allclose(forecast['ev_load_kw'], expected.round(2))
+    assert forecast['num_charging_estimated'].tolist() == [int(load / 7.2) for load in expected]
+    assert forecast['charging_rate'].tolist() == [_reference_rate(ts.hour) for ts in timestamps]
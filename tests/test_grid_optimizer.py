@@ -0,0 +1,76 @@
+"""
+Tests for the grid optimizer kernels against the pandas code they replaced
+"""
+
+import numpy as np
+import pandas as pd
+
+import config
+from utils.grid_optimizer import HOUR_HIGH, HOUR_LOW, HOUR_OPTIMAL, HOUR_PEAK, GridOptimizer
+
+
+def _forecast(n=240, seed=6):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='H'),
+        'predicted_demand': rng.uniform(0.2, 1.0, n) * config.MAX_GRID_CAPACITY
+    })
+
+
+def test_classify_hours_matches_thresholds():
+    optimizer = GridOptimizer()
+    demand = _forecast()['predicted_demand'].to_numpy()
+    load_factor = demand / optimizer.max_capacity
+    lo, hi = optimizer.optimal_range
+    
+    flags, severities = optimizer.classify_hours(demand)
+    
+    expected = np.select(
+        [load_factor > optimizer.peak_threshold, load_factor > hi, load_factor < lo],
+        [HOUR_PEAK, HOUR_HIGH, HOUR_LOW], default=HOUR_OPTIMAL
+    )
+    np.testing.assert_array_equal(flags, expected)
+    np.testing.assert_allclose(severities, load_factor)
+
+
+def test_identify_peak_hours_matches_pandas_filter():
+    optimizer = GridOptimizer()
+    forecast = _forecast()
+    load_factor = forecast['predicted_demand'] / optimizer.max_capacity
+    expected = forecast[load_factor > optimizer.peak_threshold]
+    
+    peak_hours = optimizer.identify_peak_hours(forecast)
+    
+    pd.testing.assert_frame_equal(peak_hours[forecast.columns], expected)
+    np.testing.assert_allclose(peak_hours['load_factor'], load_factor[expected.index])
+
+
+def test_load_shift_potential_matches_pandas():
+    optimizer = GridOptimizer()
+    forecast = _forecast(seed=7)
+    load_factor = forecast['predicted_demand'] / optimizer.max_capacity
+    lo, hi = optimizer.optimal_range
+    high_load = forecast[load_factor > hi]
+    low_load = forecast[load_factor < lo]
+    excess_load = high_load['predicted_demand'].sum() - hi * optimizer.max_capacity * len(high_load)
+    available_capacity = hi * optimizer.max_capacity * len(low_load) - low_load['predicted_demand'].sum()
+    shiftable = min(excess_load, available_capacity)
+    
+    potential = optimizer.calculate_load_shift_potential(forecast)
+    
+    assert potential['high_load_hours'] == len(high_load)
+    assert potential['low_load_hours'] == len(low_load)
+    assert potential['shiftable_load_mw'] == round(shiftable, 2)
+    assert potential['potential_savings_percent'] == round(shiftable / forecast['predicted_demand'].sum() * 100, 2)
+
+
+def test_peak_recommendation_lists_timestamps():
+    forecast = _forecast()
+    forecast.loc[[5, 30], 'predicted_demand'] = config.MAX_GRID_CAPACITY
+    
+    recommendations = GridOptimizer().generate_recommendations(forecast)
+    peak = next(r for r in recommendations if r['type'] == 'peak_management')
+    
+    expected = forecast.loc[forecast['predicted_demand'] > config.MAX_GRID_CAPACITY * GridOptimizer().peak_threshold, 'timestamp']
+    assert peak['affected_hours'] == expected.tolist()
+    assert all(isinstance(ts, pd.Timestamp) for ts in peak['affected_hours'])
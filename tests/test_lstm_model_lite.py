@@ -0,0 +1,58 @@
+"""
+Tests for the compiled MLP rollout against the sklearn step loop it replaced
+"""
+
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.neural_network import MLPRegressor
+
+from models.lstm_model_lite import LSTMForecaster
+
+
+def _trained_forecaster(hidden_layer_sizes=None):
+    rng = np.random.default_rng(12)
+    forecaster = LSTMForecaster(sequence_length=12, n_features=4)
+    if hidden_layer_sizes is not None:
+        forecaster.model = MLPRegressor(hidden_layer_sizes=hidden_layer_sizes, max_iter=30, random_state=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        forecaster.train(rng.random((200, 12, 4)), rng.random(200))
+    return forecaster
+
+
+def _reference_rollout(forecaster, initial_sequence, n_steps, features=None):
+    """The original loop: scaler.transform + model.predict per step, then shift the window"""
+    predictions = []
+    current_sequence = initial_sequence.copy()
+    for i in range(n_steps):
+        pred = forecaster.model.predict(forecaster.scaler.transform(current_sequence.reshape(1, -1)))
+        predictions.append(pred[0])
+        new_row = np.zeros((1, forecaster.n_features))
+        new_row[0, 0] = pred[0]
+        if features is not None and i < len(features):
+            new_row[0, 1:] = features[i]
+        else:
+            new_row[0, 1:] = current_sequence[-1, 1:]
+        current_sequence = np.vstack([current_sequence[1:], new_row])
+    return np.array(predictions)
+
+
+@pytest.mark.parametrize('hidden_layer_sizes', [None, (8,), (16, 8)])
+@pytest.mark.parametrize('with_features', [False, True])
+def test_predict_sequence_matches_step_loop(hidden_layer_sizes, with_features):
+    forecaster = _trained_forecaster(hidden_layer_sizes)
+    rng = np.random.default_rng(13)
+    initial_sequence = rng.random((12, 4))
+    features = rng.random((10, 3)) if with_features else None
+    
+    predictions = forecaster.predict_sequence(initial_sequence, 30, features)
+    
+    np.testing.assert_allclose(predictions, _reference_rollout(forecaster, initial_sequence, 30, features), rtol=1e-9)
+
+
+def test_only_three_hidden_layer_relu_networks_use_the_kernel():
+    assert _trained_forecaster()._weights is not None
+    assert _trained_forecaster((8,))._weights is None
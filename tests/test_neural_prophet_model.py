@@ -0,0 +1,25 @@
+"""
+Smoke test for the NeuralProphet forecaster (opt-in Prophet backend)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('neuralprophet')
+
+from models.neural_prophet_model import NeuralProphetForecaster
+
+
+def test_train_and_predict_future():
+    hours = 24 * 14
+    ds = pd.date_range('2024-01-01', periods=hours, freq='H')
+    y = 5000 + 1000 * np.sin(np.arange(hours) * 2 * np.pi / 24)
+    
+    forecaster = NeuralProphetForecaster()
+    forecaster.train(pd.DataFrame({'ds': ds, 'y': y}))
+    forecast = forecaster.predict_future(periods=24)
+    
+    assert list(forecast.columns) == ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+    assert len(forecast) == 24
+    assert np.isfinite(forecast['yhat'].to_numpy(dtype=np.float64)).all()
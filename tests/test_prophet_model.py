@@ -0,0 +1,36 @@
+"""
+Tests for the Prophet forecaster
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('prophet')
+
+from models.prophet_model import ProphetForecaster
+
+
+def _hourly_series(hours=24 * 14):
+    ds = pd.date_range('2024-01-01', periods=hours, freq='H')
+    y = 5000 + 1000 * np.sin(np.arange(hours) * 2 * np.pi / 24)
+    return pd.DataFrame({'ds': ds, 'y': y})
+
+
+def test_predict_future_without_uncertainty_sampling():
+    forecaster = ProphetForecaster(uncertainty_samples=0)
+    forecaster.train(_hourly_series())
+    
+    forecast = forecaster.predict_future(periods=24, freq='H')
+    
+    assert list(forecast.columns) == ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+    assert len(forecast) == 24
+    np.testing.assert_array_equal(forecast['yhat_lower'], forecast['yhat'])
+    np.testing.assert_array_equal(forecast['yhat_upper'], forecast['yhat'])
+
+
+def test_full_year_of_hourly_data_keeps_yearly_seasonality():
+    forecaster = ProphetForecaster(uncertainty_samples=0)
+    forecaster.train(_hourly_series(hours=24 * 365))
+    
+    assert 'yearly' in forecaster.model.seasonalities
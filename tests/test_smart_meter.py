@@ -0,0 +1,81 @@
+"""
+Tests for the vectorized smart meter simulation against the per-row code it replaced
+"""
+
+import numpy as np
+import pytest
+
+from utils.smart_meter import RESIDENTIAL_LOAD_HIGH, RESIDENTIAL_LOAD_LOW, SmartMeterData
+
+
+def _reference_bucket(hour):
+    """The original residential (low, high) load range per hour"""
+    if hour < 6:
+        return 1, 2
+    elif 6 <= hour < 9:
+        return 3, 5
+    elif 9 <= hour < 17:
+        return 2, 3
+    elif 17 <= hour < 22:
+        return 4, 6
+    return 2, 3
+
+
+def test_residential_bucket_tables_match_branches():
+    expected = np.array([_reference_bucket(hour) for hour in range(24)], dtype=np.float64)
+    
+    np.testing.assert_array_equal(RESIDENTIAL_LOAD_LOW, expected[:, 0])
+    np.testing.assert_array_equal(RESIDENTIAL_LOAD_HIGH, expected[:, 1])
+
+
+def test_load_profile_stays_within_hour_buckets():
+    profile = SmartMeterData(num_meters=10, seed=8).generate_load_profile('METER_00000', hours=96)
+    
+    bounds = np.array([_reference_bucket(hour) for hour in profile['timestamp'].dt.hour])
+    load = profile['consumption_kw'].to_numpy()
+    assert ((load >= bounds[:, 0]) & (load <= bounds[:, 1])).all()
+
+
+def test_real_time_readings_follow_per_meter_ranges():
+    meters = SmartMeterData(num_meters=2000, seed=9)
+    readings = meters.get_real_time_readings()
+    
+    hour = readings['timestamp'].iloc[0].hour
+    time_factor = 1 + 0.5 * np.sin((hour - 6) * np.pi / 12)
+    base = readings['consumption_kw'].to_numpy(dtype=np.float64) / time_factor
+    commercial = (readings['meter_type'] == 'commercial').to_numpy()
+    
+    assert readings['meter_id'].tolist() == [f"METER_{i:05d}" for i in range(2000)]
+    assert 0.2 < commercial.mean() < 0.4
+    tol = 0.01 / time_factor
+    assert ((base[commercial] >= 10 * 0.8 - tol) & (base[commercial] <= 50 * 1.2 + tol)).all()
+    assert ((base[~commercial] >= 2 * 0.8 - tol) & (base[~commercial] <= 5 * 1.2 + tol)).all()
+    assert readings['voltage'].between(230, 240).all()
+    assert readings['power_factor'].between(0.85, 0.95).all()
+    
+    again = SmartMeterData(num_meters=2000, seed=9).get_real_time_readings()
+    np.testing.assert_array_equal(again['consumption_kw'], readings['consumption_kw'])
+
+
+def test_meter_anomalies_match_row_loop():
+    meters = SmartMeterData(num_meters=500, seed=10)
+    readings = meters.get_real_time_readings()
+    readings.loc[[3, 70], 'consumption_kw'] = 400.0
+    readings.loc[[5, 9], 'voltage'] = [210.0, 255.5]
+    
+    frame = readings.astype({'consumption_kw': np.float64, 'voltage': np.float64})
+    frame['consumption_kw'] = frame['consumption_kw'].round(2)
+    frame['voltage'] = frame['voltage'].round(1)
+    mean, std = frame['consumption_kw'].mean(), frame['consumption_kw'].std()
+    expected = [
+        (row['meter_id'], 'high_consumption', row['consumption_kw'])
+        for _, row in frame[frame['consumption_kw'] > mean + 3 * std].iterrows()
+    ] + [
+        (row['meter_id'], 'voltage_anomaly', row['voltage'])
+        for _, row in frame[(frame['voltage'] < 220) | (frame['voltage'] > 250)].iterrows()
+    ]
+    
+    anomalies = meters.detect_meter_anomalies(readings)
+    
+    assert [(a['meter_id'], a['type'], a['value']) for a in anomalies] == expected
+    assert anomalies[0]['expected'] == pytest.approx(mean)
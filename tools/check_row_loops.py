@@ -0,0 +1,71 @@
+"""
+Guard against interpreter-bound pandas row loops in utils/
+Flags iterrows/itertuples, apply/applymap with a lambda and .iloc[i] inside for loops
+Usage: python tools/check_row_loops.py [paths...]  (exits 1 when violations are found)
+"""
+
+import re
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Append this marker to a line (with a reason) to allow it, e.g. "# row-loop: ok (5 rows at most)"
+ALLOW_MARKER = '# row-loop: ok'
+
+PATTERNS = [
+    (re.compile(r'\.(iterrows|itertuples)\('), 'row iteration'),
+    (re.compile(r'\.(apply|applymap|map)\(\s*lambda\b'), 'per-element lambda'),
+]
+
+# Positional indexing by a loop variable, e.g. df['x'].iloc[i] inside "for i in range(...)"
+LOOP_VAR = re.compile(r'^\s*for\s+(\w+)\s+in\s+range\(')
+ILOC_VAR = r'\.iloc\[\s*{}\s*\]'
+
+def check_file(path):
+    """Return (line_no, reason, line) for every violation in one file"""
+    violations = []
+    # (indent, name) of the enclosing range() loops; a loop ends at the first code line
+    # indented no deeper than its "for"
+    loop_vars = []
+    
+    for line_no, line in enumerate(path.read_text().splitlines(), start=1):
+        stripped = line.strip()
+        if stripped and not stripped.startswith('#'):
+            indent = len(line) - len(line.lstrip())
+            while loop_vars and indent <= loop_vars[-1][0]:
+                loop_vars.pop()
+        
+        if ALLOW_MARKER in line:
+            continue
+        
+        match = LOOP_VAR.match(line)
+        if match:
+            loop_vars.append((len(line) - len(line.lstrip()), match.group(1)))
+        
+        for pattern, reason in PATTERNS:
+            if pattern.search(line):
+                violations.append((line_no, reason, stripped))
+        
+        for _, var in loop_vars:
+            if re.search(ILOC_VAR.format(re.escape(var)), line):
+                violations.append((line_no, 'positional indexing in a loop', stripped))
+    
+    return violations
+
+def main(argv):
+    paths = [Path(p) for p in argv] or sorted((ROOT / 'utils').glob('*.py'))
+    
+    found = 0
+    for path in paths:
+        for line_no, reason, line in check_file(path):
+            print(f"{path}:{line_no}: {reason}: {line}")
+            found += 1
+    
+    if found:
+        print(f"\n{found} row loop(s) found - vectorize them or add '{ALLOW_MARKER} (<reason>)'")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
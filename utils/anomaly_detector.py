@@ -6,94 +6,195 @@ import numpy as np
 import pandas as pd
 from scipy import stats
 import config
+from utils.jit import njit
+from utils.data_generator import EnergyArrays
+
+# Explicit signature compiles the kernel at import (reusing the on-disk cache),
+# keeping JIT compilation off the first request
+@njit('Tuple((boolean[::1], float64[::1], float64[::1], float64[::1]))(float64[::1], int64, float64)',
+      cache=True, nogil=True, error_model='numpy')
+def _rolling_zscore(values, window, thresh):
+    """
+    Centered rolling z-scores (matches pandas rolling(window, center=True))
+    Returns (flags, z_scores, rolling_mean, rolling_std); edges are NaN
+    Keeps a running sum and sum of squares, so the pass is O(n) for any window
+    """
+    n = len(values)
+    flags = np.zeros(n, dtype=np.bool_)
+    z_scores = np.full(n, np.nan)
+    rolling_mean = np.full(n, np.nan)
+    rolling_std = np.full(n, np.nan)
+    
+    half = window // 2
+    if n < window:
+        return flags, z_scores, rolling_mean, rolling_std
+    
+    # Accumulate around the first value to limit cancellation in the variance
+    shift = values[0]
+    total = 0.0
+    sq = 0.0
+    for j in range(window):
+        d = values[j] - shift
+        total += d
+        sq += d * d
+    
+    for i in range(half, n - window + half + 1):
+        start = i - half
+        if start > 0:
+            d_in = values[start + window - 1] - shift
+            d_out = values[start - 1] - shift
+            total += d_in - d_out
+            sq += d_in * d_in - d_out * d_out
+        
+        mean = total / window
+        var = (sq - total * mean) / (window - 1)
+        if var <= 1e-9 * sq / window:
+            # Near-flat window: the running sums' rounding residue dominates the variance,
+            # so recompute exactly around the window's first value (a flat window then
+            # gives a zero deviation over zero std, i.e. NaN like pandas, and is not flagged)
+            # and restart the running sums to drop the residue
+            local = values[start]
+            local_total = 0.0
+            total = 0.0
+            sq = 0.0
+            for j in range(start, start + window):
+                local_total += values[j] - local
+                d = values[j] - shift
+                total += d
+                sq += d * d
+            local_mean = local_total / window
+            m2 = 0.0
+            for j in range(start, start + window):
+                d = values[j] - local - local_mean
+                m2 += d * d
+            var = m2 / (window - 1)
+            mean = local + local_mean
+        else:
+            mean += shift
+        std = np.sqrt(max(var, 0.0))
+        
+        rolling_mean[i] = mean
+        rolling_std[i] = std
+        z_scores[i] = abs((values[i] - mean) / std)
+        flags[i] = z_scores[i] > thresh
+    
+    return flags, z_scores, rolling_mean, rolling_std
+
+@njit('UniTuple(float64, 2)(float64[::1])', cache=True, nogil=True, error_model='numpy')
+def _mean_std(values):
+    """Mean and population std in one pass (Welford's update)"""
+    mean = 0.0
+    m2 = 0.0
+    for i in range(len(values)):
+        delta = values[i] - mean
+        mean += delta / (i + 1)
+        m2 += delta * (values[i] - mean)
+    
+    return mean, np.sqrt(m2 / len(values))
 
 class AnomalyDetector:
     def __init__(self, threshold=config.ANOMALY_THRESHOLD):
         self.threshold = threshold
         self.window = config.ANOMALY_WINDOW
+        # Reference statistics for calculate_anomaly_score, set by fit()
+        self._hist_mean = None
+        self._hist_std = None
+    
+    def fit(self, historical_data):
+        """Cache the mean/std of historical_data for repeated anomaly scoring"""
+        self._hist_mean, self._hist_std = _mean_std(np.ascontiguousarray(historical_data, dtype=np.float64))
+        return self
         
     def detect_zscore_anomalies(self, data, window=None):
         """Detect anomalies using Z-score method"""
         if window is None:
             window = self.window
         
-        anomalies = []
-        data_series = pd.Series(data)
-        
-        # Calculate rolling mean and std
-        rolling_mean = data_series.rolling(window=window, center=True).mean()
-        rolling_std = data_series.rolling(window=window, center=True).std()
-        
-        # Calculate Z-scores
-        z_scores = np.abs((data_series - rolling_mean) / rolling_std)
-        
-        # Identify anomalies
-        anomaly_indices = np.where(z_scores > self.threshold)[0]
-        
-        for idx in anomaly_indices:
-            if not np.isnan(z_scores[idx]):
-                anomalies.append({
-                    'index': int(idx),
-                    'value': float(data[idx]),
-                    'z_score': float(z_scores[idx]),
-                    'expected_range': (
-                        float(rolling_mean[idx] - self.threshold * rolling_std[idx]),
-                        float(rolling_mean[idx] + self.threshold * rolling_std[idx])
-                    ),
-                    'severity': 'high' if z_scores[idx] > self.threshold * 1.5 else 'medium'
-                })
-        
-        return anomalies
+        values = np.ascontiguousarray(data, dtype=np.float64)
+        
+        # Rolling mean/std and Z-scores in one compiled pass
+        flags, z_scores, rolling_mean, rolling_std = _rolling_zscore(values, int(window), float(self.threshold))
+        
+        # Identify anomalies and compute their fields on the filtered arrays
+        idxs = np.flatnonzero(flags)
+        z = z_scores[idxs]
+        margin = self.threshold * rolling_std[idxs]
+        lows = rolling_mean[idxs] - margin
+        highs = rolling_mean[idxs] + margin
+        high_severity = z > self.threshold * 1.5
+        
+        return [
+            {
+                'index': idx,
+                'value': value,
+                'z_score': z_score,
+                'expected_range': (low, high),
+                'severity': 'high' if severe else 'medium'
+            }
+            for idx, value, z_score, low, high, severe in zip(
+                idxs.tolist(), values[idxs].tolist(), z.tolist(),
+                lows.tolist(), highs.tolist(), high_severity.tolist()
+            )
+        ]
     
     def detect_iqr_anomalies(self, data):
         """Detect anomalies using Interquartile Range (IQR) method"""
-        q1 = np.percentile(data, 25)
-        q3 = np.percentile(data, 75)
+        data = np.asarray(data, dtype=np.float64)
+        q1, q3 = np.percentile(data, [25, 75])
         iqr = q3 - q1
         
         lower_bound = q1 - 1.5 * iqr
         upper_bound = q3 + 1.5 * iqr
+        expected_range = (float(lower_bound), float(upper_bound))
+        
+        idxs = np.flatnonzero((data < lower_bound) | (data > upper_bound))
+        vals = data[idxs]
+        deviation = np.minimum(np.abs(vals - lower_bound), np.abs(vals - upper_bound))
+        high_severity = (vals < lower_bound - iqr) | (vals > upper_bound + iqr)
         
-        anomalies = []
-        for idx, value in enumerate(data):
-            if value < lower_bound or value > upper_bound:
-                anomalies.append({
-                    'index': int(idx),
-                    'value': float(value),
-                    'expected_range': (float(lower_bound), float(upper_bound)),
-                    'deviation': float(min(abs(value - lower_bound), abs(value - upper_bound))),
-                    'severity': 'high' if (value < lower_bound - iqr or value > upper_bound + iqr) else 'medium'
-                })
-        
-        return anomalies
+        return [
+            {
+                'index': idx,
+                'value': value,
+                'expected_range': expected_range,
+                'deviation': dev,
+                'severity': 'high' if severe else 'medium'
+            }
+            for idx, value, dev, severe in zip(
+                idxs.tolist(), vals.tolist(), deviation.tolist(), high_severity.tolist()
+            )
+        ]
     
     def detect_sudden_changes(self, data, change_threshold=0.3):
         """Detect sudden changes in consumption patterns"""
-        changes = []
-        data_series = pd.Series(data)
-        
-        # Calculate percentage change
-        pct_change = data_series.pct_change()
-        
-        # Find significant changes
-        significant_changes = np.where(np.abs(pct_change) > change_threshold)[0]
-        
-        for idx in significant_changes:
-            if idx > 0 and not np.isnan(pct_change[idx]):
-                changes.append({
-                    'index': int(idx),
-                    'from_value': float(data[idx-1]),
-                    'to_value': float(data[idx]),
-                    'change_percent': float(pct_change[idx] * 100),
-                    'type': 'spike' if pct_change[idx] > 0 else 'drop',
-                    'severity': 'high' if abs(pct_change[idx]) > change_threshold * 2 else 'medium'
-                })
-        
-        return changes
+        values = np.asarray(data, dtype=np.float64)
+        
+        # Step-to-step fractional change and significant changes; leaving a zero reading
+        # gives +/-inf and is flagged, while 0 -> 0 gives NaN and is not
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct_change = np.diff(values) / values[:-1]
+        idxs = np.flatnonzero(np.abs(pct_change) > change_threshold) + 1
+        pct = pct_change[idxs - 1]
+        high_severity = np.abs(pct) > change_threshold * 2
+        
+        return [
+            {
+                'index': idx,
+                'from_value': from_value,
+                'to_value': to_value,
+                'change_percent': change * 100,
+                'type': 'spike' if change > 0 else 'drop',
+                'severity': 'high' if severe else 'medium'
+            }
+            for idx, from_value, to_value, change, severe in zip(
+                idxs.tolist(), values[idxs - 1].tolist(), values[idxs].tolist(),
+                pct.tolist(), high_severity.tolist()
+            )
+        ]
     
     def analyze_anomalies(self, df, target_column='energy_demand'):
-        """Comprehensive anomaly analysis"""
-        data = df[target_column].values
+        """Comprehensive anomaly analysis (df may also be EnergyArrays or a 1-D array of values)"""
+        data = np.asarray(df[target_column]) if isinstance(df, (pd.DataFrame, EnergyArrays)) else np.asarray(df)
         
         # Detect using multiple methods
         zscore_anomalies = self.detect_zscore_anomalies(data)
@@ -115,10 +216,11 @@ class AnomalyDetector:
         """Generate user-friendly anomaly alerts"""
         anomalies = self.analyze_anomalies(df, target_column)
         alerts = []
+        timestamps = np.asarray(df['timestamp']) if 'timestamp' in df.columns else None
         
         # Z-score anomalies
         for anom in anomalies['zscore_anomalies'][:5]:  # Top 5
-            timestamp = df.iloc[anom['index']]['timestamp'] if 'timestamp' in df.columns else f"Index {anom['index']}"
+            timestamp = pd.Timestamp(timestamps[anom['index']]) if timestamps is not None else f"Index {anom['index']}"
             alerts.append({
                 'type': 'statistical_anomaly',
                 'severity': anom['severity'],
@@ -129,7 +231,7 @@ class AnomalyDetector:
         
         # Sudden changes
         for change in anomalies['sudden_changes'][:3]:  # Top 3
-            timestamp = df.iloc[change['index']]['timestamp'] if 'timestamp' in df.columns else f"Index {change['index']}"
+            timestamp = pd.Timestamp(timestamps[change['index']]) if timestamps is not None else f"Index {change['index']}"
             alerts.append({
                 'type': 'sudden_change',
                 'severity': change['severity'],
@@ -140,10 +242,17 @@ class AnomalyDetector:
         
         return alerts
     
-    def calculate_anomaly_score(self, value, historical_data):
-        """Calculate anomaly score for a single value"""
-        mean = np.mean(historical_data)
-        std = np.std(historical_data)
+    def calculate_anomaly_score(self, value, historical_data=None):
+        """
+        Calculate anomaly score for a single value
+        Scores against historical_data if given, otherwise against the statistics cached by fit()
+        """
+        if historical_data is not None:
+            mean, std = _mean_std(np.ascontiguousarray(historical_data, dtype=np.float64))
+        elif self._hist_mean is not None:
+            mean, std = self._hist_mean, self._hist_std
+        else:
+            raise ValueError("No historical data: pass historical_data or call fit() first")
         
         if std == 0:
             return 0
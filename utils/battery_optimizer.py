@@ -6,15 +6,84 @@ Optimizes battery energy storage systems for grid applications
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from utils.jit import njit
+
+# Action codes returned by _run_schedule, indexing ACTION_NAMES
+ACTION_IDLE = 0
+ACTION_CHARGE = 1
+ACTION_DISCHARGE = 2
+ACTION_NAMES = np.array(['idle', 'charge', 'discharge'], dtype=object)
+
+# Time-of-day window per hour: off-peak charging (0-5), mid-day solar charging (11-14),
+# evening peak discharging (17-21); the kernel gates each on the state of charge
+WINDOW_NONE = 0
+WINDOW_OFF_PEAK = 1
+WINDOW_SOLAR = 2
+WINDOW_PEAK = 3
+HOUR_WINDOW = np.zeros(24, dtype=np.int8)
+HOUR_WINDOW[0:6] = WINDOW_OFF_PEAK
+HOUR_WINDOW[11:15] = WINDOW_SOLAR
+HOUR_WINDOW[17:22] = WINDOW_PEAK
+
+# Explicit signature: compiled at import (and cached on disk), not on the first request
+@njit('Tuple((int8[::1], float64[::1], float64[::1], float64[::1], float64[::1]))'
+      '(int64[::1], float64, float64, float64, float64, float64, float64)', cache=True, nogil=True)
+def _run_schedule(hours, soc0, capacity, power_rating, efficiency, min_soc, max_soc):
+    """
+    Step the state of charge through the forecast hours
+    Returns (actions, power, energy, soc_before, soc_after); actions are ACTION_* codes
+    """
+    n = len(hours)
+    actions = np.zeros(n, dtype=np.int8)
+    power = np.zeros(n)
+    energy = np.zeros(n)
+    soc_before = np.empty(n)
+    soc_after = np.empty(n)
+    
+    soc = soc0
+    for i in range(n):
+        hour = hours[i]
+        window = HOUR_WINDOW[hour] if 0 <= hour < 24 else WINDOW_NONE
+        soc_before[i] = soc
+        
+        # Off-peak hours charge, peak hours discharge, mid-day (solar) tops up a low battery
+        action = ACTION_IDLE
+        if window == WINDOW_OFF_PEAK and soc < max_soc:
+            action = ACTION_CHARGE
+        elif window == WINDOW_PEAK and soc > min_soc:
+            action = ACTION_DISCHARGE
+        elif window == WINDOW_SOLAR and soc < 0.6:
+            action = ACTION_CHARGE
+        
+        if action == ACTION_CHARGE:
+            p = min(power_rating, (max_soc - soc) * capacity)
+            e = p * efficiency
+            soc = min(max_soc, soc + e / capacity)
+        elif action == ACTION_DISCHARGE:
+            p = min(power_rating, (soc - min_soc) * capacity)
+            e = p / efficiency
+            soc = max(min_soc, soc - e / capacity)
+        else:
+            p = 0.0
+            e = 0.0
+        
+        actions[i] = action
+        power[i] = p
+        energy[i] = e
+        soc_after[i] = soc
+    
+    return actions, power, energy, soc_before, soc_after
 
 class BatteryStorageOptimizer:
-    def __init__(self, capacity_mwh=100, power_rating_mw=50, efficiency=0.9):
+    def __init__(self, capacity_mwh=100, power_rating_mw=50, efficiency=0.9, seed=None):
         """
         Initialize battery storage optimizer
         capacity_mwh: total energy capacity in MWh
         power_rating_mw: maximum charge/discharge power in MW
         efficiency: round-trip efficiency (0-1)
+        seed: seed for the default price noise (None for fresh entropy)
         """
+        self.rng = np.random.default_rng(seed)
         self.capacity_mwh = capacity_mwh
         self.power_rating_mw = power_rating_mw
         self.efficiency = efficiency
@@ -28,76 +97,46 @@ class BatteryStorageOptimizer:
         demand_forecast: DataFrame with predicted demand
         price_forecast: DataFrame with electricity prices (optional)
         """
-        schedule = []
-        current_soc = self.current_soc
-        
-        for idx, row in demand_forecast.iterrows():
-            hour = row['timestamp'].hour if 'timestamp' in row else idx
-            demand = row.get('predicted_demand', row.get('energy_demand', 5000))
-            
-            # Determine action based on time and demand
-            action = self._determine_action(hour, demand, current_soc, price_forecast)
-            
-            # Calculate power and energy
-            if action == 'charge':
-                power = min(self.power_rating_mw, 
-                           (self.max_soc - current_soc) * self.capacity_mwh)
-                energy = power * self.efficiency
-                new_soc = min(self.max_soc, current_soc + (energy / self.capacity_mwh))
-            elif action == 'discharge':
-                power = min(self.power_rating_mw,
-                           (current_soc - self.min_soc) * self.capacity_mwh)
-                energy = power / self.efficiency
-                new_soc = max(self.min_soc, current_soc - (energy / self.capacity_mwh))
-            else:  # idle
-                power = 0
-                energy = 0
-                new_soc = current_soc
-            
-            schedule.append({
-                'hour': hour,
-                'action': action,
-                'power_mw': round(power, 2),
-                'energy_mwh': round(energy, 2),
-                'soc_before': round(current_soc * 100, 1),
-                'soc_after': round(new_soc * 100, 1),
-                'grid_impact': round(-power if action == 'discharge' else power, 2)
-            })
-            
-            current_soc = new_soc
-        
-        return pd.DataFrame(schedule)
-    
-    def _determine_action(self, hour, demand, soc, price_forecast=None):
-        """Determine whether to charge, discharge, or idle"""
-        # Off-peak hours (low demand) - charge
-        if hour in [0, 1, 2, 3, 4, 5] and soc < self.max_soc:
-            return 'charge'
-        
-        # Peak hours (high demand) - discharge
-        elif hour in [17, 18, 19, 20, 21] and soc > self.min_soc:
-            return 'discharge'
+        # Resolve the hour of day once: timestamps, then a precomputed hour column,
+        # otherwise treat the rows as consecutive hours starting at midnight
+        columns = demand_forecast.columns
+        if 'timestamp' in columns:
+            hours = demand_forecast['timestamp'].dt.hour.to_numpy(dtype=np.int64)
+        elif 'hour' in columns:
+            hours = demand_forecast['hour'].to_numpy(dtype=np.int64)
+        else:
+            hours = np.arange(len(demand_forecast), dtype=np.int64) % 24
         
-        # Mid-day (potential solar) - charge if low SOC
-        elif hour in [11, 12, 13, 14] and soc < 0.6:
-            return 'charge'
+        actions, power, energy, soc_before, soc_after = _run_schedule(
+            np.ascontiguousarray(hours), float(self.current_soc), float(self.capacity_mwh),
+            float(self.power_rating_mw), float(self.efficiency),
+            float(self.min_soc), float(self.max_soc)
+        )
         
-        # Otherwise idle
-        else:
-            return 'idle'
+        return pd.DataFrame({
+            'hour': hours,
+            'action': ACTION_NAMES[actions],
+            'power_mw': power.round(2),
+            'energy_mwh': energy.round(2),
+            'soc_before': (soc_before * 100).round(1),
+            'soc_after': (soc_after * 100).round(1),
+            'grid_impact': np.where(actions == ACTION_DISCHARGE, -power, power).round(2)
+        })
     
     def calculate_peak_shaving_benefit(self, demand_forecast):
         """Calculate benefit of using battery for peak shaving"""
         schedule = self.optimize_charging_schedule(demand_forecast)
+        action = schedule['action'].to_numpy()
+        energy = schedule['energy_mwh'].to_numpy()
+        discharge = action == 'discharge'
         
         # Calculate peak reduction
-        discharge_hours = schedule[schedule['action'] == 'discharge']
-        total_peak_reduction = discharge_hours['power_mw'].sum()
+        total_peak_reduction = float(schedule['power_mw'].to_numpy()[discharge].sum())
         
         benefit = {
             'peak_reduction_mw': round(total_peak_reduction, 2),
-            'energy_discharged_mwh': round(discharge_hours['energy_mwh'].sum(), 2),
-            'energy_charged_mwh': round(schedule[schedule['action'] == 'charge']['energy_mwh'].sum(), 2),
+            'energy_discharged_mwh': round(float(energy[discharge].sum()), 2),
+            'energy_charged_mwh': round(float(energy[action == 'charge'].sum()), 2),
             'round_trip_loss_mwh': 0,
             'cost_savings': 0,
             'demand_charge_reduction': 0
@@ -132,21 +171,26 @@ class BatteryStorageOptimizer:
             'efficiency_loss': 0
         }
         
-        # Find low and high price hours
-        avg_price = price_forecast['price'].mean()
-        low_price_hours = price_forecast[price_forecast['price'] < avg_price * 0.8]
-        high_price_hours = price_forecast[price_forecast['price'] > avg_price * 1.2]
+        # Find low and high price hours (an empty side trades nothing, so its mean is 0)
+        prices = price_forecast['price'].to_numpy(dtype=np.float64)
+        avg_price = prices.mean()
+        low_mask = prices < avg_price * 0.8
+        high_mask = prices > avg_price * 1.2
+        low_count = int(np.count_nonzero(low_mask))
+        high_count = int(np.count_nonzero(high_mask))
+        low_mean = prices[low_mask].mean() if low_count else 0.0
+        high_mean = prices[high_mask].mean() if high_count else 0.0
         
         # Calculate potential arbitrage
-        max_charge = min(len(low_price_hours), self.capacity_mwh / self.power_rating_mw)
-        max_discharge = min(len(high_price_hours), self.capacity_mwh / self.power_rating_mw)
+        max_charge = min(low_count, self.capacity_mwh / self.power_rating_mw)
+        max_discharge = min(high_count, self.capacity_mwh / self.power_rating_mw)
         
         energy_traded = min(max_charge, max_discharge) * self.power_rating_mw
         
         arbitrage['buy_energy_mwh'] = round(energy_traded, 2)
         arbitrage['sell_energy_mwh'] = round(energy_traded * self.efficiency, 2)
-        arbitrage['buy_cost'] = round(energy_traded * low_price_hours['price'].mean(), 2)
-        arbitrage['sell_revenue'] = round(arbitrage['sell_energy_mwh'] * high_price_hours['price'].mean(), 2)
+        arbitrage['buy_cost'] = round(energy_traded * low_mean, 2)
+        arbitrage['sell_revenue'] = round(arbitrage['sell_energy_mwh'] * high_mean, 2)
         arbitrage['net_revenue'] = round(arbitrage['sell_revenue'] - arbitrage['buy_cost'], 2)
         arbitrage['efficiency_loss'] = round(energy_traded * (1 - self.efficiency), 2)
         
@@ -154,18 +198,11 @@ class BatteryStorageOptimizer:
     
     def _generate_default_prices(self, hours):
         """Generate default electricity price profile"""
-        prices = []
-        for h in range(hours):
-            if h in [0, 1, 2, 3, 4, 5]:
-                price = 30  # Off-peak
-            elif h in [17, 18, 19, 20, 21]:
-                price = 80  # Peak
-            else:
-                price = 50  # Mid-peak
-            
-            prices.append({'hour': h, 'price': price + np.random.uniform(-5, 5)})
+        hour = np.arange(hours)
+        # Off-peak, peak, otherwise mid-peak
+        price = np.select([hour <= 5, (hour >= 17) & (hour <= 21)], [30, 80], default=50)
         
-        return pd.DataFrame(prices)
+        return pd.DataFrame({'hour': hour, 'price': price + self.rng.uniform(-5, 5, hours)})
     
     def calculate_frequency_regulation_value(self):
         """Calculate value from providing frequency regulation services"""
@@ -210,11 +247,14 @@ class BatteryStorageOptimizer:
         }
         
         schedule = self.optimize_charging_schedule(demand_forecast)
+        action = schedule['action'].to_numpy()
+        energy = schedule['energy_mwh'].to_numpy()
+        discharge = action == 'discharge'
         
-        results['total_energy_charged'] = float(schedule[schedule['action'] == 'charge']['energy_mwh'].sum())
-        results['total_energy_discharged'] = float(schedule[schedule['action'] == 'discharge']['energy_mwh'].sum())
+        results['total_energy_charged'] = float(energy[action == 'charge'].sum())
+        results['total_energy_discharged'] = float(energy[discharge].sum())
         results['total_cycles'] = round(results['total_energy_discharged'] / self.capacity_mwh, 2)
-        results['peak_shaving_events'] = len(schedule[schedule['action'] == 'discharge'])
+        results['peak_shaving_events'] = int(np.count_nonzero(discharge))
         results['average_soc'] = round(schedule['soc_after'].mean(), 1)
         
         if results['total_energy_charged'] > 0:
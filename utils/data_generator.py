@@ -5,70 +5,106 @@ Generates realistic energy consumption patterns with seasonal, daily, and random
 
 import numpy as np
 import pandas as pd
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
-import sys
 import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
 
+@dataclass
+class EnergyArrays:
+    """
+    Struct-of-arrays form of the energy dataset
+    Measurements are float32 and calendar fields int8, so hot read paths
+    touch a fraction of the memory a float64 DataFrame would
+    """
+    timestamp: np.ndarray
+    energy_demand: np.ndarray
+    temperature: np.ndarray
+    hour: np.ndarray
+    day_of_week: np.ndarray
+    month: np.ndarray
+    is_weekend: np.ndarray
+    
+    @classmethod
+    def from_dataframe(cls, df):
+        """Build from a DataFrame with the generator's columns"""
+        return cls(
+            timestamp=df['timestamp'].to_numpy(),
+            energy_demand=df['energy_demand'].to_numpy(dtype=np.float32),
+            temperature=df['temperature'].to_numpy(dtype=np.float32),
+            hour=df['hour'].to_numpy(dtype=np.int8),
+            day_of_week=df['day_of_week'].to_numpy(dtype=np.int8),
+            month=df['month'].to_numpy(dtype=np.int8),
+            is_weekend=df['is_weekend'].to_numpy(dtype=np.int8)
+        )
+    
+    @property
+    def columns(self):
+        return [field.name for field in fields(self)]
+    
+    def __len__(self):
+        return len(self.timestamp)
+    
+    def __getitem__(self, column):
+        return getattr(self, column)
+    
+    def tail(self, hours):
+        """Last `hours` rows as views (no copies)"""
+        start = max(len(self) - hours, 0)
+        return EnergyArrays(*(self[column][start:] for column in self.columns))
+    
+    def to_dict(self):
+        return {column: self[column] for column in self.columns}
+    
+    def to_dataframe(self):
+        """Convert back to a DataFrame for legacy callers"""
+        return pd.DataFrame(self.to_dict())
+
 class EnergyDataGenerator:
-    def __init__(self, days=365):
+    def __init__(self, days=365, seed=None):
         self.days = days
         self.hours = days * 24
+        # One PCG64 Generator for every random draw; pass a seed for reproducible data
+        self.rng = np.random.default_rng(seed)
         
     def generate_base_load(self):
         """Generate base load pattern (average consumption)"""
         # Base load around 5000 MW with slight random variation
-        base = 5000 + np.random.normal(0, 100, self.hours)
+        base = 5000 + self.rng.normal(0, 100, self.hours)
         return base
     
     def generate_daily_pattern(self):
         """Generate daily consumption pattern (higher during day, lower at night)"""
-        pattern = np.zeros(self.hours)
-        for i in range(self.hours):
-            hour_of_day = i % 24
-            # Peak during 8am-10pm, low during night
-            if 6 <= hour_of_day <= 22:
-                pattern[i] = 2000 * np.sin((hour_of_day - 6) * np.pi / 16)
-            else:
-                pattern[i] = -500
-        return pattern
+        hour_of_day = np.arange(self.hours) % 24
+        # Peak during 8am-10pm, low during night
+        daytime = (hour_of_day >= 6) & (hour_of_day <= 22)
+        return np.where(daytime, 2000 * np.sin((hour_of_day - 6) * np.pi / 16), -500.0)
     
     def generate_weekly_pattern(self):
         """Generate weekly pattern (lower on weekends)"""
-        pattern = np.zeros(self.hours)
-        for i in range(self.hours):
-            day_of_week = (i // 24) % 7
-            # Lower consumption on weekends (5, 6)
-            if day_of_week in [5, 6]:
-                pattern[i] = -800
-            else:
-                pattern[i] = 400
-        return pattern
+        day_of_week = (np.arange(self.hours) // 24) % 7
+        # Lower consumption on weekends (5, 6)
+        return np.where(day_of_week >= 5, -800.0, 400.0)
     
     def generate_seasonal_pattern(self):
         """Generate seasonal pattern (higher in summer/winter for AC/heating)"""
-        pattern = np.zeros(self.hours)
-        for i in range(self.hours):
-            day_of_year = (i // 24) % 365
-            # Higher in summer (days 150-240) and winter (days 0-60, 300-365)
-            seasonal_factor = np.sin(2 * np.pi * day_of_year / 365)
-            pattern[i] = 1500 * abs(seasonal_factor)
-        return pattern
+        day_of_year = (np.arange(self.hours) // 24) % 365
+        # Higher in summer (days 150-240) and winter (days 0-60, 300-365)
+        seasonal_factor = np.sin(2 * np.pi * day_of_year / 365)
+        return 1500 * np.abs(seasonal_factor)
     
     def generate_weather_impact(self):
         """Simulate weather impact on energy demand"""
         # Temperature variation affects AC/heating usage
         temperature = 20 + 15 * np.sin(np.linspace(0, 4*np.pi, self.hours))
-        temperature += np.random.normal(0, 3, self.hours)
+        temperature += self.rng.normal(0, 3, self.hours)
         
-        # Extreme temperatures increase energy demand
-        weather_load = np.zeros(self.hours)
-        for i in range(self.hours):
-            if temperature[i] > 30:  # Hot weather - AC usage
-                weather_load[i] = (temperature[i] - 30) * 100
-            elif temperature[i] < 10:  # Cold weather - heating
-                weather_load[i] = (10 - temperature[i]) * 80
+        # Extreme temperatures increase energy demand: AC above 30C, heating below 10C
+        weather_load = np.select(
+            [temperature > 30, temperature < 10],
+            [(temperature - 30) * 100, (10 - temperature) * 80],
+            default=0.0
+        )
         
         return weather_load, temperature
     
@@ -77,10 +113,10 @@ class EnergyDataGenerator:
         events = np.zeros(self.hours)
         num_events = int(self.hours * 0.02)  # 2% of hours have events
         
-        event_indices = np.random.choice(self.hours, num_events, replace=False)
-        for idx in event_indices:
-            # Random spike or drop
-            events[idx] = np.random.choice([-1, 1]) * np.random.uniform(500, 1500)
+        event_indices = self.rng.choice(self.hours, num_events, replace=False)
+        # Random spike or drop, drawn for all events at once
+        signs = self.rng.choice([-1.0, 1.0], num_events)
+        events[event_indices] = signs * self.rng.uniform(500, 1500, num_events)
         
         return events
     
@@ -88,7 +124,7 @@ class EnergyDataGenerator:
         """Generate complete synthetic energy demand dataset"""
         # Start date
         start_date = datetime.now() - timedelta(days=self.days)
-        timestamps = [start_date + timedelta(hours=i) for i in range(self.hours)]
+        timestamps = pd.date_range(start=start_date, periods=self.hours, freq='H')
         
         # Combine all patterns
         base_load = self.generate_base_load()
@@ -102,28 +138,34 @@ class EnergyDataGenerator:
         energy_demand = base_load + daily + weekly + seasonal + weather_load + events
         
         # Add small random noise
-        energy_demand += np.random.normal(0, 50, self.hours)
+        energy_demand += self.rng.normal(0, 50, self.hours)
         
         # Ensure non-negative values
         energy_demand = np.maximum(energy_demand, 1000)
         
-        # Create DataFrame
+        # Create DataFrame (float32 measurements and int8 calendar fields, matching EnergyArrays)
+        day_of_week = timestamps.dayofweek
         df = pd.DataFrame({
             'timestamp': timestamps,
-            'energy_demand': energy_demand,
-            'temperature': temperature,
-            'hour': [t.hour for t in timestamps],
-            'day_of_week': [t.weekday() for t in timestamps],
-            'month': [t.month for t in timestamps],
-            'is_weekend': [1 if t.weekday() >= 5 else 0 for t in timestamps]
+            'energy_demand': energy_demand.astype(np.float32),
+            'temperature': temperature.astype(np.float32),
+            'hour': timestamps.hour.astype(np.int8),
+            'day_of_week': day_of_week.astype(np.int8),
+            'month': timestamps.month.astype(np.int8),
+            'is_weekend': (day_of_week >= 5).astype(np.int8)
         })
         
         return df
     
+    def generate_arrays(self):
+        """Generate the dataset as EnergyArrays"""
+        return EnergyArrays.from_dataframe(self.generate_data())
+    
     def save_data(self, filepath='data/historical_data.csv'):
-        """Generate and save data to CSV"""
+        """Generate and save data to CSV, plus a Parquet copy for fast reloads"""
         df = self.generate_data()
         df.to_csv(filepath, index=False)
+        df.to_parquet(os.path.splitext(filepath)[0] + '.parquet', engine='pyarrow', compression='snappy')
         print(f"Generated {len(df)} hours of data and saved to {filepath}")
         return df
 
@@ -6,10 +6,59 @@ Manages solar, wind, storage, and other distributed resources
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from utils.jit import njit, prange
+
+# Diurnal wind factor by hour of day (typically higher at night: 0-6 and 20-23)
+WIND_DIURNAL_FACTOR = np.full(24, 0.8)
+WIND_DIURNAL_FACTOR[0:7] = 1.2
+WIND_DIURNAL_FACTOR[20:24] = 1.2
+
+# Fused dispatch loop: one pass per hour, no temporaries (compiled at import, cached on disk)
+@njit('UniTuple(float64[::1], 5)(float64[::1], float64[::1], float64[::1], float64, float64)',
+      cache=True, nogil=True, parallel=True)
+def _dispatch_kernel(demand, solar, wind, battery_power, backup_capacity):
+    """
+    Per-hour DER dispatch
+    Returns (battery, backup, grid_import, curtailment, renewable_penetration)
+    """
+    n = len(demand)
+    battery = np.empty(n)
+    backup = np.empty(n)
+    grid_import = np.empty(n)
+    curtailment = np.empty(n)
+    penetration = np.empty(n)
+    
+    for i in prange(n):
+        net_demand = demand[i] - solar[i] - wind[i]
+        
+        if net_demand > 0:
+            # Shortfall: battery discharges first, then backup generation, then grid import
+            discharge = min(net_demand, battery_power)
+            remaining = net_demand - discharge
+            battery[i] = discharge
+            backup[i] = min(remaining, backup_capacity)
+            grid_import[i] = remaining - backup[i]
+            curtailment[i] = 0.0
+        else:
+            # Surplus: battery charges (negative dispatch), the rest is curtailed
+            surplus = -net_demand
+            charge = min(surplus, battery_power)
+            battery[i] = -charge
+            backup[i] = 0.0
+            grid_import[i] = 0.0
+            curtailment[i] = surplus - charge
+        
+        if demand[i] > 0:
+            penetration[i] = (solar[i] + wind[i]) / demand[i] * 100
+        else:
+            penetration[i] = 0.0
+    
+    return battery, backup, grid_import, curtailment, penetration
 
 class DERManager:
-    def __init__(self):
-        """Initialize DER management system"""
+    def __init__(self, seed=None):
+        """Initialize DER management system (seed makes the generation forecasts reproducible)"""
+        self.rng = np.random.default_rng(seed)
         self.resources = {
             'solar': {'capacity_mw': 50, 'type': 'solar'},
             'wind': {'capacity_mw': 30, 'type': 'wind'},
@@ -17,80 +66,131 @@ class DERManager:
             'diesel_gen': {'capacity_mw': 20, 'type': 'backup'}
         }
         
-    def predict_solar_generation(self, hours_ahead=24):
-        """Predict solar PV generation"""
-        predictions = []
-        current_time = datetime.now()
+    def _forecast_index(self, hours_ahead):
+        """Hourly forecast timestamps starting now"""
+        return pd.date_range(datetime.now(), periods=hours_ahead, freq='H')
+    
+    def _scenario_capacity(self, resource, capacity_mw, n_scenarios):
+        """Installed capacity (MW), as a (n_scenarios, 1) column when sweeping scenarios"""
+        if capacity_mw is None:
+            capacity_mw = self.resources[resource]['capacity_mw']
+        if n_scenarios is None:
+            return capacity_mw
+        return np.broadcast_to(np.asarray(capacity_mw, dtype=np.float64), (n_scenarios,))[:, None]
+    
+    def _solar_mw(self, timestamps, n_scenarios=None, capacity_mw=None, cloud=None, rng=None):
+        """
+        Solar PV generation (MW) for each timestamp
+        With n_scenarios, returns an (n_scenarios, hours) matrix of independent cloud draws;
+        capacity_mw may then be a scalar or one capacity per scenario
+        cloud: pre-drawn cloud factors (0.7-1.0), shape (hours,) or (n_scenarios, hours);
+        rng: Generator to draw from instead of self.rng
+        """
+        hour = timestamps.hour.to_numpy()
+        month = timestamps.month.to_numpy()
         
-        for i in range(hours_ahead):
-            timestamp = current_time + timedelta(hours=i)
-            hour = timestamp.hour
-            month = timestamp.month
-            
-            # Solar generation pattern (0 at night, peak at noon)
-            if 6 <= hour <= 18:
-                # Base generation curve
-                solar_factor = np.sin((hour - 6) * np.pi / 12)
-                
-                # Seasonal adjustment
-                seasonal_factor = 0.7 + 0.3 * np.sin((month - 3) * np.pi / 6)
-                
-                # Cloud cover (random)
-                cloud_factor = np.random.uniform(0.7, 1.0)
-                
-                generation = (self.resources['solar']['capacity_mw'] * 
-                            solar_factor * seasonal_factor * cloud_factor)
-            else:
-                generation = 0
-            
-            predictions.append({
-                'timestamp': timestamp,
-                'solar_generation_mw': round(generation, 2),
-                'capacity_factor': round(generation / self.resources['solar']['capacity_mw'] * 100, 1) if generation > 0 else 0
-            })
+        # Solar generation pattern (0 at night, peak at noon)
+        daytime = (hour >= 6) & (hour <= 18)
+        solar_factor = np.sin((hour - 6) * np.pi / 12)
+        
+        # Seasonal adjustment
+        seasonal_factor = 0.7 + 0.3 * np.sin((month - 3) * np.pi / 6)
         
-        return pd.DataFrame(predictions)
+        # Cloud cover (random, drawn for daylight hours only)
+        if cloud is not None:
+            cloud_factor = np.where(daytime, cloud, 0.0)
+        else:
+            n_daytime = np.count_nonzero(daytime)
+            shape = (len(timestamps),) if n_scenarios is None else (n_scenarios, len(timestamps))
+            cloud_factor = np.zeros(shape)
+            cloud_factor[..., daytime] = (rng or self.rng).uniform(0.7, 1.0, shape[:-1] + (n_daytime,))
+        
+        capacity = self._scenario_capacity('solar', capacity_mw, n_scenarios)
+        return capacity * solar_factor * seasonal_factor * cloud_factor
     
-    def predict_wind_generation(self, hours_ahead=24):
-        """Predict wind turbine generation"""
-        predictions = []
-        current_time = datetime.now()
+    def _wind_mw(self, timestamps, n_scenarios=None, capacity_mw=None, base_wind=None, rng=None):
+        """
+        Wind turbine generation (MW) for each timestamp
+        With n_scenarios, returns an (n_scenarios, hours) matrix (see _solar_mw)
+        base_wind: pre-drawn wind factors (0.3-0.9), shape (hours,) or (n_scenarios, hours)
+        """
+        # Wind generation (more variable than solar) with its diurnal pattern
+        if base_wind is None:
+            shape = (len(timestamps),) if n_scenarios is None else (n_scenarios, len(timestamps))
+            base_wind = (rng or self.rng).uniform(0.3, 0.9, shape)
+        wind_factor = WIND_DIURNAL_FACTOR[timestamps.hour.to_numpy()]
         
-        for i in range(hours_ahead):
-            timestamp = current_time + timedelta(hours=i)
-            hour = timestamp.hour
-            
-            # Wind generation (more variable than solar)
-            base_wind = np.random.uniform(0.3, 0.9)
-            
-            # Diurnal pattern (typically higher at night)
-            if 0 <= hour <= 6 or 20 <= hour <= 23:
-                wind_factor = 1.2
-            else:
-                wind_factor = 0.8
-            
-            generation = (self.resources['wind']['capacity_mw'] * 
-                         base_wind * wind_factor)
-            
-            predictions.append({
-                'timestamp': timestamp,
-                'wind_generation_mw': round(generation, 2),
-                'capacity_factor': round(generation / self.resources['wind']['capacity_mw'] * 100, 1)
-            })
+        capacity = self._scenario_capacity('wind', capacity_mw, n_scenarios)
+        return capacity * base_wind * wind_factor
+    
+    def predict_solar_generation(self, hours_ahead=24, cloud=None, rng=None):
+        """
+        Predict solar PV generation
+        cloud: optional pre-drawn (hours_ahead,) cloud factors in 0.7-1.0; rng: optional Generator
+        """
+        timestamps = self._forecast_index(hours_ahead)
+        generation = self._solar_mw(timestamps, cloud=cloud, rng=rng)
+        percent_per_mw = 100.0 / self.resources['solar']['capacity_mw']
+        
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'solar_generation_mw': generation.round(2),
+            'capacity_factor': np.where(generation > 0, (generation * percent_per_mw).round(1), 0.0)
+        })
+    
+    def predict_wind_generation(self, hours_ahead=24, base_wind=None, rng=None):
+        """
+        Predict wind turbine generation
+        base_wind: optional pre-drawn (hours_ahead,) wind factors in 0.3-0.9; rng: optional Generator
+        """
+        timestamps = self._forecast_index(hours_ahead)
+        generation = self._wind_mw(timestamps, base_wind=base_wind, rng=rng)
+        percent_per_mw = 100.0 / self.resources['wind']['capacity_mw']
         
-        return pd.DataFrame(predictions)
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'wind_generation_mw': generation.round(2),
+            'capacity_factor': (generation * percent_per_mw).round(1)
+        })
+    
+    def predict_solar_generation_batch(self, hours_ahead=24, n_scenarios=100, capacity_mw=None,
+                                       cloud=None, rng=None):
+        """
+        Monte-Carlo solar scenarios in one pass
+        Returns (timestamps, generation) with generation an (n_scenarios, hours_ahead) array in MW;
+        pass capacity_mw as an (n_scenarios,) array to sweep candidate capacities
+        For large sweeps, pass cloud as a pre-drawn (n_scenarios, hours_ahead) low-discrepancy
+        sample (e.g. scipy.stats.qmc.Sobol scaled to 0.7 + 0.3 * u) to cut variance at equal cost
+        """
+        timestamps = self._forecast_index(hours_ahead)
+        if cloud is not None:
+            n_scenarios = len(cloud)
+        return timestamps, self._solar_mw(timestamps, n_scenarios, capacity_mw, cloud, rng)
+    
+    def predict_wind_generation_batch(self, hours_ahead=24, n_scenarios=100, capacity_mw=None,
+                                      base_wind=None, rng=None):
+        """
+        Monte-Carlo wind scenarios in one pass (see predict_solar_generation_batch)
+        A pre-drawn base_wind sample should be scaled to 0.3 + 0.6 * u
+        """
+        timestamps = self._forecast_index(hours_ahead)
+        if base_wind is not None:
+            n_scenarios = len(base_wind)
+        return timestamps, self._wind_mw(timestamps, n_scenarios, capacity_mw, base_wind, rng)
     
-    def aggregate_der_forecast(self, hours_ahead=24):
-        """Aggregate all DER forecasts"""
-        solar = self.predict_solar_generation(hours_ahead)
-        wind = self.predict_wind_generation(hours_ahead)
+    def aggregate_der_forecast(self, hours_ahead=24, rng=None):
+        """Aggregate all DER forecasts (rng: optional Generator to draw from instead of self.rng)"""
+        # One shared index, so solar and wind line up hour for hour
+        timestamps = self._forecast_index(hours_ahead)
+        solar = self._solar_mw(timestamps, rng=rng).round(2)
+        wind = self._wind_mw(timestamps, rng=rng).round(2)
         
         # Combine forecasts
         aggregate = pd.DataFrame({
-            'timestamp': solar['timestamp'],
-            'solar_mw': solar['solar_generation_mw'],
-            'wind_mw': wind['wind_generation_mw'],
-            'total_renewable_mw': solar['solar_generation_mw'] + wind['wind_generation_mw'],
+            'timestamp': timestamps,
+            'solar_mw': solar,
+            'wind_mw': wind,
+            'total_renewable_mw': solar + wind,
             'battery_available_mw': self.resources['battery']['power_mw'],
             'backup_available_mw': self.resources['diesel_gen']['capacity_mw']
         })
@@ -100,45 +200,53 @@ class DERManager:
     def optimize_der_dispatch(self, demand_forecast, der_forecast):
         """
         Optimize dispatch of distributed energy resources
+        demand_forecast: DataFrame or dict of column arrays with
+        'predicted_demand' or 'energy_demand'
         """
-        dispatch_schedule = []
+        demand_col = 'predicted_demand' if 'predicted_demand' in demand_forecast else 'energy_demand'
+        demand = np.asarray(demand_forecast[demand_col], dtype=np.float64)
+        solar = der_forecast['solar_mw'].to_numpy(dtype=np.float64)[:len(demand)]
+        wind = der_forecast['wind_mw'].to_numpy(dtype=np.float64)[:len(demand)]
         
-        for idx in range(len(demand_forecast)):
-            demand = demand_forecast.iloc[idx]['predicted_demand'] if 'predicted_demand' in demand_forecast.columns else demand_forecast.iloc[idx]['energy_demand']
-            solar = der_forecast.iloc[idx]['solar_mw']
-            wind = der_forecast.iloc[idx]['wind_mw']
-            
-            # Calculate net demand after renewables
-            net_demand = demand - solar - wind
-            
-            # Determine resource dispatch
-            if net_demand > 0:
-                # Need additional power
-                battery_dispatch = min(net_demand, self.resources['battery']['power_mw'])
-                remaining = net_demand - battery_dispatch
-                backup_dispatch = min(remaining, self.resources['diesel_gen']['capacity_mw'])
-                grid_import = max(0, remaining - backup_dispatch)
-            else:
-                # Excess renewable energy
-                battery_charge = min(abs(net_demand), self.resources['battery']['power_mw'])
-                curtailment = max(0, abs(net_demand) - battery_charge)
-                battery_dispatch = -battery_charge  # Negative = charging
-                backup_dispatch = 0
-                grid_import = 0
-            
-            dispatch_schedule.append({
-                'hour': idx,
-                'demand_mw': round(demand, 2),
-                'solar_mw': round(solar, 2),
-                'wind_mw': round(wind, 2),
-                'battery_mw': round(battery_dispatch, 2),
-                'backup_mw': round(backup_dispatch, 2) if net_demand > 0 else 0,
-                'grid_import_mw': round(grid_import, 2) if net_demand > 0 else 0,
-                'curtailment_mw': round(curtailment, 2) if net_demand < 0 else 0,
-                'renewable_penetration': round((solar + wind) / demand * 100, 1) if demand > 0 else 0
-            })
+        dispatch = self.optimize_der_dispatch_batch(demand, solar, wind)
         
-        return pd.DataFrame(dispatch_schedule)
+        # Build from a dict of 1-D arrays: each column keeps its own contiguous buffer,
+        # so per-column reductions downstream stay cache friendly (a row-major 2-D
+        # stack would make every column a strided view)
+        return pd.DataFrame({
+            'hour': np.arange(len(demand)),
+            'demand_mw': demand.round(2),
+            'solar_mw': solar.round(2),
+            'wind_mw': wind.round(2),
+            'battery_mw': dispatch['battery_mw'].round(2),
+            'backup_mw': dispatch['backup_mw'].round(2),
+            'grid_import_mw': dispatch['grid_import_mw'].round(2),
+            'curtailment_mw': dispatch['curtailment_mw'].round(2),
+            'renewable_penetration': dispatch['renewable_penetration'].round(1)
+        })
+    
+    def optimize_der_dispatch_batch(self, demand, solar, wind):
+        """
+        Dispatch on raw arrays; demand, solar and wind broadcast against each other,
+        so (n_scenarios, hours) inputs (or a shared (hours,) demand) give (n_scenarios, hours) outputs
+        Returns a dict of unrounded arrays keyed like the optimize_der_dispatch columns
+        """
+        demand, solar, wind = np.broadcast_arrays(
+            np.asarray(demand, dtype=np.float64),
+            np.asarray(solar, dtype=np.float64),
+            np.asarray(wind, dtype=np.float64)
+        )
+        shape = demand.shape
+        
+        # The kernel works on flat contiguous arrays; scenarios are independent, so flatten them
+        outputs = _dispatch_kernel(
+            np.ascontiguousarray(demand).ravel(), np.ascontiguousarray(solar).ravel(),
+            np.ascontiguousarray(wind).ravel(), float(self.resources['battery']['power_mw']),
+            float(self.resources['diesel_gen']['capacity_mw'])
+        )
+        
+        keys = ('battery_mw', 'backup_mw', 'grid_import_mw', 'curtailment_mw', 'renewable_penetration')
+        return {key: values.reshape(shape) for key, values in zip(keys, outputs)}
     
     def calculate_der_benefits(self, dispatch_schedule):
         """Calculate benefits of DER integration"""
@@ -152,15 +260,18 @@ class DERManager:
             'self_sufficiency_ratio': 0
         }
         
-        # Calculate totals
-        benefits['renewable_energy_mwh'] = round(
-            (dispatch_schedule['solar_mw'] + dispatch_schedule['wind_mw']).sum(), 2
-        )
+        # Sum every needed column once, straight from its array (selecting the columns as
+        # a 2-D block first would copy them); everything below works on these scalars
+        totals = {
+            column: float(dispatch_schedule[column].to_numpy().sum())
+            for column in ('solar_mw', 'wind_mw', 'demand_mw', 'grid_import_mw', 'renewable_penetration')
+        }
+        total_demand = totals['demand_mw']
+        total_import = totals['grid_import_mw']
         
-        total_demand = dispatch_schedule['demand_mw'].sum()
-        benefits['grid_import_reduction_mwh'] = round(
-            total_demand - dispatch_schedule['grid_import_mw'].sum(), 2
-        )
+        # Calculate totals
+        benefits['renewable_energy_mwh'] = round(totals['solar_mw'] + totals['wind_mw'], 2)
+        benefits['grid_import_reduction_mwh'] = round(total_demand - total_import, 2)
         
         # Environmental benefits
         benefits['co2_reduction_tons'] = round(benefits['renewable_energy_mwh'] * 0.5, 2)  # 0.5 tons/MWh
@@ -169,43 +280,43 @@ class DERManager:
         benefits['cost_savings'] = round(benefits['renewable_energy_mwh'] * 60, 2)  # $60/MWh avoided
         
         # Performance metrics
-        benefits['renewable_penetration_avg'] = round(
-            dispatch_schedule['renewable_penetration'].mean(), 1
-        )
+        if len(dispatch_schedule) > 0:
+            benefits['renewable_penetration_avg'] = round(totals['renewable_penetration'] / len(dispatch_schedule), 1)
         
         if total_demand > 0:
-            benefits['self_sufficiency_ratio'] = round(
-                (1 - dispatch_schedule['grid_import_mw'].sum() / total_demand) * 100, 1
-            )
+            benefits['self_sufficiency_ratio'] = round((1 - total_import / total_demand) * 100, 1)
         
         return benefits
     
     def identify_der_expansion_opportunities(self, dispatch_schedule):
         """Identify opportunities for DER expansion"""
         opportunities = []
+        grid_import = dispatch_schedule['grid_import_mw'].to_numpy()
+        curtailment = dispatch_schedule['curtailment_mw'].to_numpy()
         
         # Check for high grid import hours
-        high_import = dispatch_schedule[dispatch_schedule['grid_import_mw'] > 100]
+        high_import = grid_import[grid_import > 100]
         if len(high_import) > 0:
             opportunities.append({
                 'type': 'battery_expansion',
                 'reason': f'{len(high_import)} hours with high grid import',
-                'recommended_capacity': round(high_import['grid_import_mw'].mean(), 2),
+                'recommended_capacity': round(float(high_import.mean()), 2),
                 'estimated_benefit': 'Reduce peak demand charges'
             })
         
         # Check for curtailment
-        curtailed = dispatch_schedule[dispatch_schedule['curtailment_mw'] > 0]
+        curtailed = curtailment[curtailment > 0]
         if len(curtailed) > 0:
+            curtailed_mwh = float(curtailed.sum())
             opportunities.append({
                 'type': 'storage_expansion',
-                'reason': f'{curtailed["curtailment_mw"].sum():.2f} MWh curtailed',
-                'recommended_capacity': round(curtailed['curtailment_mw'].mean() * 4, 2),
+                'reason': f'{curtailed_mwh:.2f} MWh curtailed',
+                'recommended_capacity': round(curtailed_mwh / len(curtailed) * 4, 2),
                 'estimated_benefit': 'Capture excess renewable energy'
             })
         
         # Check renewable penetration
-        avg_penetration = dispatch_schedule['renewable_penetration'].mean()
+        avg_penetration = float(dispatch_schedule['renewable_penetration'].to_numpy().mean())
         if avg_penetration < 50:
             opportunities.append({
                 'type': 'renewable_expansion',
@@ -5,6 +5,57 @@ Grid Optimization and Load Balancing
 import numpy as np
 import pandas as pd
 import config
+from utils.jit import njit
+
+# Hour classification codes returned by _classify_hours
+HOUR_LOW = -1
+HOUR_OPTIMAL = 0
+HOUR_HIGH = 1
+HOUR_PEAK = 2
+
+# Explicit signature: compiled at import (and cached on disk), not on the first request
+@njit('Tuple((int8[::1], float64[::1]))(float64[::1], float64, float64, float64, float64)', cache=True, nogil=True)
+def _classify_hours(demand, max_cap, peak_thr, lo, hi):
+    """
+    Classify each forecast hour against the load thresholds
+    Returns (flags, severities): int8 HOUR_* codes and the load factor per hour
+    """
+    n = len(demand)
+    flags = np.zeros(n, dtype=np.int8)
+    severities = np.empty(n)
+    
+    for i in range(n):
+        load_factor = demand[i] / max_cap
+        severities[i] = load_factor
+        if load_factor > peak_thr:
+            flags[i] = HOUR_PEAK
+        elif load_factor > hi:
+            flags[i] = HOUR_HIGH
+        elif load_factor < lo:
+            flags[i] = HOUR_LOW
+    
+    return flags, severities
+
+@njit('UniTuple(float64, 4)(float64[::1], int8[::1])', cache=True, nogil=True)
+def _shift_sums(demand, flags):
+    """
+    Single pass over classified hours
+    Returns (high_sum, high_count, low_sum, low_count) for hours above / below the optimal range
+    """
+    high_sum = 0.0
+    high_count = 0.0
+    low_sum = 0.0
+    low_count = 0.0
+    
+    for i in range(len(demand)):
+        if flags[i] >= HOUR_HIGH:
+            high_sum += demand[i]
+            high_count += 1.0
+        elif flags[i] == HOUR_LOW:
+            low_sum += demand[i]
+            low_count += 1.0
+    
+    return high_sum, high_count, low_sum, low_count
 
 class GridOptimizer:
     def __init__(self, max_capacity=config.MAX_GRID_CAPACITY):
@@ -12,57 +63,99 @@ class GridOptimizer:
         self.peak_threshold = config.PEAK_THRESHOLD
         self.optimal_range = config.OPTIMAL_LOAD_RANGE
         
+        # Upper bound of the optimal range in MW, bound once for _load_shift_potential
+        self._opt_hi_mw = self.max_capacity * self.optimal_range[1]
+        
     def calculate_load_factor(self, demand):
         """Calculate current load factor (0-1)"""
         return demand / self.max_capacity
     
     def identify_peak_hours(self, forecast_df):
-        """Identify hours with peak demand"""
-        forecast_df['load_factor'] = forecast_df['predicted_demand'] / self.max_capacity
-        peak_hours = forecast_df[forecast_df['load_factor'] > self.peak_threshold].copy()
+        """Identify hours with peak demand; returns those rows with a load_factor column"""
+        peak_idx, load_factors = self.peak_hour_indices(forecast_df)
+        peak_hours = forecast_df.iloc[peak_idx].copy()
+        peak_hours['load_factor'] = load_factors[peak_idx]
         return peak_hours
     
-    def calculate_load_shift_potential(self, forecast_df):
-        """Calculate potential for load shifting"""
-        forecast_df['load_factor'] = forecast_df['predicted_demand'] / self.max_capacity
+    def peak_hour_indices(self, forecast_df):
+        """
+        Array form of identify_peak_hours
+        Returns (peak_idx, load_factors): positional indices of the peak hours and the per-hour
+        load factor, without materializing the peak rows
+        """
+        flags, load_factors = self.classify_hours(forecast_df['predicted_demand'].to_numpy())
+        return np.flatnonzero(flags == HOUR_PEAK), load_factors
+    
+    def calculate_load_shift_potential(self, forecast_df, flags=None):
+        """
+        Calculate potential for load shifting
+        flags: HOUR_* codes from classify_hours, to reuse a classification already done
+        """
+        return self._load_shift_potential(forecast_df['predicted_demand'].to_numpy(), flags)
+    
+    def classify_hours(self, predicted_demand):
+        """Per-hour HOUR_* flags and load factors for an array of predicted demand"""
+        return _classify_hours(
+            np.ascontiguousarray(predicted_demand, dtype=np.float64), float(self.max_capacity),
+            float(self.peak_threshold), float(self.optimal_range[0]), float(self.optimal_range[1])
+        )
+    
+    def _load_shift_potential(self, predicted_demand, flags=None):
+        """Load shifting potential for an array of predicted demand (MW)"""
+        predicted_demand = np.ascontiguousarray(predicted_demand, dtype=np.float64)
+        if flags is None:
+            flags, _ = self.classify_hours(predicted_demand)
         
-        # Find hours above and below optimal range
-        high_load = forecast_df[forecast_df['load_factor'] > self.optimal_range[1]]
-        low_load = forecast_df[forecast_df['load_factor'] < self.optimal_range[0]]
+        # Sum hours above and below optimal range in one pass
+        high_sum, n_high, low_sum, n_low = _shift_sums(predicted_demand, flags)
         
         # Calculate shiftable load
-        excess_load = high_load['predicted_demand'].sum() - (self.optimal_range[1] * self.max_capacity * len(high_load))
-        available_capacity = (self.optimal_range[1] * self.max_capacity * len(low_load)) - low_load['predicted_demand'].sum()
+        excess_load = high_sum - (self._opt_hi_mw * n_high)
+        available_capacity = (self._opt_hi_mw * n_low) - low_sum
         
         shiftable = min(excess_load, available_capacity)
         
         return {
             'shiftable_load_mw': round(shiftable, 2),
-            'high_load_hours': len(high_load),
-            'low_load_hours': len(low_load),
-            'potential_savings_percent': round((shiftable / forecast_df['predicted_demand'].sum()) * 100, 2)
+            'high_load_hours': int(n_high),
+            'low_load_hours': int(n_low),
+            'potential_savings_percent': round((shiftable / float(predicted_demand.sum())) * 100, 2)
         }
     
-    def generate_recommendations(self, forecast_df):
-        """Generate grid optimization recommendations"""
+    def generate_recommendations(self, predicted_demand, timestamps=None):
+        """
+        Generate grid optimization recommendations
+        predicted_demand: ndarray of forecast demand (MW); timestamps: matching array, optional
+        A forecast DataFrame (predicted_demand and optional timestamp columns) is also accepted
+        """
+        if isinstance(predicted_demand, pd.DataFrame):
+            forecast_df = predicted_demand
+            predicted_demand = forecast_df['predicted_demand'].to_numpy()
+            if timestamps is None and 'timestamp' in forecast_df.columns:
+                timestamps = forecast_df['timestamp'].to_numpy()
+        predicted_demand = np.asarray(predicted_demand, dtype=np.float64)
+        
         recommendations = []
         
-        # Identify peak hours
-        peak_hours = self.identify_peak_hours(forecast_df)
+        flags, severities = self.classify_hours(predicted_demand)
+        
+        # Identify peak hours (sparse, so only these are touched from Python)
+        peak_idx = np.flatnonzero(flags == HOUR_PEAK)
+        n_peak = len(peak_idx)
         
-        if len(peak_hours) > 0:
+        if n_peak > 0:
             recommendations.append({
                 'type': 'peak_management',
                 'priority': 'high',
                 'title': 'Peak Demand Alert',
-                'description': f'{len(peak_hours)} hours forecasted above {int(self.peak_threshold*100)}% capacity',
+                'description': f'{n_peak} hours forecasted above {int(self.peak_threshold*100)}% capacity',
                 'action': 'Implement demand response programs or activate reserve capacity',
-                'affected_hours': peak_hours['timestamp'].tolist() if 'timestamp' in peak_hours.columns else [],
-                'estimated_impact': f'{int(peak_hours["load_factor"].max()*100)}% peak load'
+                'affected_hours': pd.DatetimeIndex(timestamps[peak_idx]).tolist() if timestamps is not None else [],
+                'estimated_impact': f'{int(severities[peak_idx].max()*100)}% peak load'
             })
         
         # Load shifting opportunities
-        shift_potential = self.calculate_load_shift_potential(forecast_df)
+        shift_potential = self._load_shift_potential(predicted_demand, flags)
         if shift_potential['shiftable_load_mw'] > 100:
             recommendations.append({
                 'type': 'load_shifting',
@@ -74,7 +167,7 @@ class GridOptimizer:
             })
         
         # Renewable energy integration
-        avg_load = forecast_df['predicted_demand'].mean()
+        avg_load = predicted_demand.mean()
         if avg_load < self.max_capacity * 0.6:
             recommendations.append({
                 'type': 'renewable_integration',
@@ -86,7 +179,7 @@ class GridOptimizer:
             })
         
         # Grid stability
-        load_variance = forecast_df['predicted_demand'].std()
+        load_variance = float(predicted_demand.std(ddof=1))
         if load_variance > 1000:
             recommendations.append({
                 'type': 'stability',
@@ -101,16 +194,15 @@ class GridOptimizer:
     
     def calculate_cost_optimization(self, forecast_df, peak_rate=0.15, off_peak_rate=0.08):
         """Calculate potential cost savings through optimization"""
-        forecast_df['load_factor'] = forecast_df['predicted_demand'] / self.max_capacity
+        predicted_demand = forecast_df['predicted_demand'].to_numpy(dtype=np.float64)
+        flags, _ = self.classify_hours(predicted_demand)
         
-        # Current cost (assuming peak rates during high load)
-        forecast_df['rate'] = forecast_df['load_factor'].apply(
-            lambda x: peak_rate if x > self.optimal_range[1] else off_peak_rate
-        )
-        current_cost = (forecast_df['predicted_demand'] * forecast_df['rate']).sum()
+        # Current cost (assuming peak rates during high load, i.e. above the optimal range)
+        rate = np.where(flags >= HOUR_HIGH, peak_rate, off_peak_rate)
+        current_cost = float(predicted_demand @ rate)
         
         # Optimized cost (with load shifting)
-        shift_potential = self.calculate_load_shift_potential(forecast_df)
+        shift_potential = self._load_shift_potential(predicted_demand, flags)
         optimized_cost = current_cost * (1 - shift_potential['potential_savings_percent'] / 100)
         
         return {
@@ -155,7 +247,9 @@ if __name__ == "__main__":
         'predicted_demand': np.random.uniform(4000, 9000, 24)
     })
     
-    recommendations = optimizer.generate_recommendations(forecast)
+    recommendations = optimizer.generate_recommendations(
+        forecast['predicted_demand'].to_numpy(), forecast['timestamp'].to_numpy()
+    )
     print("Grid Optimization Recommendations:")
     for rec in recommendations:
         print(f"\n{rec['title']} ({rec['priority']} priority)")
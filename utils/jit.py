@@ -0,0 +1,25 @@
+"""
+Optional Numba JIT support
+Falls back to plain Python functions when numba is not installed
+"""
+
+import os
+import config
+
+# Keep cache=True kernels in one persistent directory (numba reads this at import)
+os.environ.setdefault('NUMBA_CACHE_DIR', config.NUMBA_CACHE_DIR)
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+    
+    # Parallel loops run serially without numba
+    prange = range
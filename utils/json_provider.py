@@ -0,0 +1,80 @@
+"""
+orjson-backed JSON Provider for Flask
+Serializes NumPy arrays/scalars and datetimes in C instead of the stdlib json module
+"""
+
+import decimal
+import numpy as np
+import pandas as pd
+import orjson
+import pyarrow as pa
+from flask.json.provider import JSONProvider
+
+try:
+    import ormsgpack
+except ImportError:
+    ormsgpack = None
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+def _default(obj):
+    """Fallback for types orjson does not handle natively"""
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, np.ndarray):
+        # Object-dtype arrays (e.g. strings, Timestamps) are not supported natively
+        return obj.tolist()
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.to_numpy()
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class OrjsonProvider(JSONProvider):
+    """Drop-in replacement for Flask's DefaultJSONProvider"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS),
+            mimetype='application/json'
+        )
+
+def df_to_columnar(df):
+    """
+    Convert a DataFrame to a column-oriented payload
+    Avoids building one dict per row; columns stay as ndarrays for orjson
+    """
+    return {
+        'columns': list(df.columns),
+        'index': df.index.to_numpy(),
+        'data': {col: df[col].to_numpy() for col in df.columns}
+    }
+
+def serialize_df(df, accept):
+    """
+    Encode a DataFrame in a binary format requested via the Accept header
+    Returns (body, mimetype), or None when the client should get JSON
+    """
+    if 'arrow' in accept:
+        return pa.ipc.serialize_pandas(df, preserve_index=False).to_pybytes(), ARROW_MIMETYPE
+    
+    if 'msgpack' in accept and ormsgpack is not None:
+        body = ormsgpack.packb(
+            df_to_columnar(df),
+            default=_default,
+            option=ormsgpack.OPT_SERIALIZE_NUMPY | ormsgpack.OPT_NON_STR_KEYS
+        )
+        return body, MSGPACK_MIMETYPE
+    
+    return None
@@ -0,0 +1,52 @@
+"""
+Forecast Error Metrics
+"""
+
+import numpy as np
+from utils.jit import njit
+
+# Explicit signature: compiled at import (and cached on disk), not on the first evaluation
+@njit('UniTuple(float64, 4)(float64[::1], float64[::1])', cache=True, nogil=True)
+def _error_sums(actual, predicted):
+    """
+    Sums of absolute, squared and absolute percentage errors in one traversal
+    Returns (abs_sum, sq_sum, ape_sum, nonzero_count); zero actuals are left out of ape_sum
+    """
+    abs_sum = 0.0
+    sq_sum = 0.0
+    ape_sum = 0.0
+    nonzero = 0.0
+    
+    for i in range(len(actual)):
+        diff = actual[i] - predicted[i]
+        abs_diff = abs(diff)
+        abs_sum += abs_diff
+        sq_sum += diff * diff
+        if actual[i] != 0:
+            ape_sum += abs_diff / abs(actual[i])
+            nonzero += 1.0
+    
+    return abs_sum, sq_sum, ape_sum, nonzero
+
+def forecast_errors(actual, predicted):
+    """
+    MAE, MSE, RMSE and MAPE from a single pass over the residuals
+    MAPE skips zero actuals (NaN if every actual is zero) instead of returning inf
+    """
+    actual = np.ascontiguousarray(actual, dtype=np.float64).ravel()
+    predicted = np.ascontiguousarray(predicted, dtype=np.float64).ravel()
+    n = len(actual)
+    if len(predicted) != n:
+        raise ValueError(f"Length mismatch: {n} actual vs {len(predicted)} predicted values")
+    
+    abs_sum, sq_sum, ape_sum, nonzero = _error_sums(actual, predicted)
+    
+    mse = sq_sum / n
+    mape = ape_sum / nonzero * 100 if nonzero else float('nan')
+    
+    return {
+        'mae': abs_sum / n,
+        'mse': mse,
+        'rmse': float(np.sqrt(mse)),
+        'mape': mape
+    }
@@ -5,16 +5,21 @@ Enables energy demand forecasting across multiple geographic regions
 
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from models.ensemble_predictor_simple import EnsemblePredictor
 
 class MultiRegionForecaster:
-    def __init__(self, regions=None):
+    def __init__(self, regions=None, n_jobs=1):
         """
         Initialize multi-region forecaster
         regions: list of region names/IDs
+        n_jobs: threads for predict_all_regions (1: serial; None: one per region, up to 8)
+        Threads only pay off for heavy models; the statistical ensemble predicts in well under
+        a millisecond per region, less than the cost of starting a pool
         """
         self.regions = regions or ['North', 'South', 'East', 'West', 'Central']
+        self.n_jobs = n_jobs
         self.region_models = {}
         self.region_characteristics = {}
         
@@ -22,6 +27,10 @@ class MultiRegionForecaster:
         for region in self.regions:
             self.region_models[region] = EnsemblePredictor()
             self.region_characteristics[region] = self._get_region_characteristics(region)
+        
+        # Per-region scalars used on every prediction, as arrays indexed by region position
+        self._region_idx = {region: i for i, region in enumerate(self.regions)}
+        self._peak_mult = np.array([self.region_characteristics[r]['peak_multiplier'] for r in self.regions])
     
     def _get_region_characteristics(self, region):
         """Get characteristics for each region"""
@@ -86,8 +95,7 @@ class MultiRegionForecaster:
         predictions = self.region_models[region].predict(historical_data, hours_ahead)
         
         # Apply region-specific adjustments
-        char = self.region_characteristics[region]
-        predictions['predicted_demand'] *= char['peak_multiplier']
+        predictions['predicted_demand'] *= self._peak_mult[self._region_idx[region]]
         predictions['region'] = region
         
         return predictions
@@ -97,17 +105,23 @@ class MultiRegionForecaster:
         Predict for all regions
         historical_data_dict: {region_name: historical_df}
         """
-        all_predictions = {}
+        regions = [region for region in self.regions if region in historical_data_dict]
+        n_jobs = self.n_jobs or min(8, len(regions))
         
-        for region in self.regions:
-            if region in historical_data_dict:
-                all_predictions[region] = self.predict_region(
-                    region, 
-                    historical_data_dict[region], 
-                    hours_ahead
-                )
-        
-        return all_predictions
+        if n_jobs <= 1 or len(regions) <= 1:
+            return {
+                region: self.predict_region(region, historical_data_dict[region], hours_ahead)
+                for region in regions
+            }
+        
+        # Regions have independent models, and the NumPy-heavy predictions release the GIL
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [
+                executor.submit(self.predict_region, region, historical_data_dict[region], hours_ahead)
+                for region in regions
+            ]
+            # Collect in submission order so the dict keeps the region order
+            return {region: future.result() for region, future in zip(regions, futures)}
     
     def get_regional_summary(self, predictions_dict):
         """Get summary statistics across all regions"""
@@ -134,27 +148,24 @@ class MultiRegionForecaster:
         """
         Identify opportunities to transfer load between regions
         """
-        opportunities = []
-        
-        # Find regions with excess capacity and high demand
-        for region1, pred1 in predictions_dict.items():
-            for region2, pred2 in predictions_dict.items():
-                if region1 == region2:
-                    continue
-                
-                # Check if region1 has low demand when region2 has high demand
-                avg1 = pred1['predicted_demand'].mean()
-                avg2 = pred2['predicted_demand'].mean()
-                
-                if avg1 < 5000 and avg2 > 8000:
-                    opportunities.append({
-                        'from_region': region1,
-                        'to_region': region2,
-                        'potential_transfer': min(5000 - avg1, avg2 - 8000),
-                        'benefit': 'Load balancing across regions'
-                    })
-        
-        return opportunities
+        regions = list(predictions_dict)
+        avgs = np.array([pred['predicted_demand'].mean() for pred in predictions_dict.values()])
+        
+        # Pair every low-demand region with every high-demand one (a region can't be both)
+        low_mask = avgs < 5000
+        high_mask = avgs > 8000
+        pairs = np.argwhere(low_mask[:, None] & high_mask[None, :])
+        transfer = np.minimum(5000 - avgs[pairs[:, 0]], avgs[pairs[:, 1]] - 8000)
+        
+        return [
+            {
+                'from_region': regions[i],
+                'to_region': regions[j],
+                'potential_transfer': amount,
+                'benefit': 'Load balancing across regions'
+            }
+            for (i, j), amount in zip(pairs.tolist(), transfer.tolist())
+        ]
     
     def optimize_inter_regional_flow(self, predictions_dict):
         """Optimize power flow between regions"""
@@ -7,85 +7,121 @@ import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 import config
 
+ROLLING_WINDOWS = [24, 168]
+
 class DataPreprocessor:
     def __init__(self):
-        self.scaler = MinMaxScaler()
+        # Target min-max statistics (set by scale_features with fit=True); the 1-D target is
+        # scaled inline, the multi-column features go through sklearn
+        self._tmin = None
+        self._trange = None
         self.feature_scaler = MinMaxScaler()
         
-    def create_lag_features(self, df, column='energy_demand', lags=None):
-        """Create lag features for time series"""
+    def create_lag_features(self, df, column='energy_demand', lags=None, copy=True):
+        """
+        Create lag features for time series
+        copy=False lets the result share df's columns (for pipelines that own df)
+        """
         if lags is None:
             lags = config.LAG_FEATURES
         
-        df_copy = df.copy()
-        for lag in lags:
-            df_copy[f'{column}_lag_{lag}'] = df_copy[column].shift(lag)
+        # Build every lag first and attach them in one concat (no per-column inserts)
+        series = df[column]
+        lag_features = {f'{column}_lag_{lag}': series.shift(lag) for lag in lags}
         
-        return df_copy
+        return pd.concat([df, pd.DataFrame(lag_features, index=df.index)], axis=1, copy=copy)
     
-    def create_rolling_features(self, df, column='energy_demand', windows=[24, 168]):
-        """Create rolling mean and std features"""
-        df_copy = df.copy()
+    def create_rolling_features(self, df, column='energy_demand', windows=None, copy=True):
+        """
+        Create rolling mean and std features
+        copy=False lets the result share df's columns (for pipelines that own df)
+        """
+        if windows is None:
+            windows = ROLLING_WINDOWS
+        
+        series = df[column]
+        rolling_features = {}
         for window in windows:
-            df_copy[f'{column}_rolling_mean_{window}'] = df_copy[column].rolling(window=window).mean()
-            df_copy[f'{column}_rolling_std_{window}'] = df_copy[column].rolling(window=window).std()
+            # One Rolling object per window serves both statistics
+            rolling = series.rolling(window=window)
+            rolling_features[f'{column}_rolling_mean_{window}'] = rolling.mean()
+            rolling_features[f'{column}_rolling_std_{window}'] = rolling.std()
         
-        return df_copy
+        return pd.concat([df, pd.DataFrame(rolling_features, index=df.index)], axis=1, copy=copy)
     
     def create_time_features(self, df):
         """Extract time-based features from timestamp"""
-        df_copy = df.copy()
-        
-        if 'timestamp' in df_copy.columns:
-            df_copy['timestamp'] = pd.to_datetime(df_copy['timestamp'])
-            df_copy['hour'] = df_copy['timestamp'].dt.hour
-            df_copy['day_of_week'] = df_copy['timestamp'].dt.dayofweek
-            df_copy['month'] = df_copy['timestamp'].dt.month
-            df_copy['day_of_year'] = df_copy['timestamp'].dt.dayofyear
-            df_copy['is_weekend'] = (df_copy['day_of_week'] >= 5).astype(int)
-            
-            # Cyclical encoding for hour and month
-            df_copy['hour_sin'] = np.sin(2 * np.pi * df_copy['hour'] / 24)
-            df_copy['hour_cos'] = np.cos(2 * np.pi * df_copy['hour'] / 24)
-            df_copy['month_sin'] = np.sin(2 * np.pi * df_copy['month'] / 12)
-            df_copy['month_cos'] = np.cos(2 * np.pi * df_copy['month'] / 12)
-        
-        return df_copy
+        if 'timestamp' not in df.columns:
+            return df.copy()
+        
+        timestamps = pd.to_datetime(df['timestamp'])
+        hour = timestamps.dt.hour.to_numpy()
+        day_of_week = timestamps.dt.dayofweek.to_numpy()
+        month = timestamps.dt.month.to_numpy()
+        
+        # Cyclical encoding for hour and month (each angle computed once for sin and cos)
+        hour_angle = 2 * np.pi * hour / 24
+        month_angle = 2 * np.pi * month / 12
+        
+        # Calendar fields fit in int16 (is_weekend in int8); only the cyclical encodings are float
+        time_features = pd.DataFrame({
+            'hour': hour.astype(np.int16),
+            'day_of_week': day_of_week.astype(np.int16),
+            'month': month.astype(np.int16),
+            'day_of_year': timestamps.dt.dayofyear.to_numpy().astype(np.int16),
+            'is_weekend': (day_of_week >= 5).astype(np.int8),
+            'hour_sin': np.sin(hour_angle),
+            'hour_cos': np.cos(hour_angle),
+            'month_sin': np.sin(month_angle),
+            'month_cos': np.cos(month_angle)
+        }, index=df.index)
+        
+        # Recomputed features replace any stale copies; everything is attached in one concat
+        df_copy = df.drop(columns=time_features.columns.intersection(df.columns))
+        df_copy['timestamp'] = timestamps
+        
+        return pd.concat([df_copy, time_features], axis=1)
     
-    def handle_missing_values(self, df):
-        """Handle missing values using forward fill and interpolation"""
-        df_copy = df.copy()
+    def handle_missing_values(self, df, copy=True):
+        """
+        Handle missing values using forward fill and interpolation
+        copy=False fills df itself (for pipelines that own df)
+        """
+        # At most one copy up front; every step below then works in place on it
+        df_copy = df.copy() if copy else df
         
         # Forward fill for small gaps
-        df_copy = df_copy.fillna(method='ffill', limit=3)
+        df_copy.ffill(limit=3, inplace=True)
         
         # Interpolate for larger gaps
-        df_copy = df_copy.interpolate(method='linear')
+        df_copy.interpolate(method='linear', inplace=True)
         
         # Drop remaining NaN values
-        df_copy = df_copy.dropna()
+        df_copy.dropna(inplace=True)
         
         return df_copy
     
     def scale_features(self, data, fit=True):
-        """Scale features to [0, 1] range"""
+        """Scale a 1-D series to [0, 1] range"""
+        data = np.ravel(data)
         if fit:
-            scaled = self.scaler.fit_transform(data.reshape(-1, 1))
-        else:
-            scaled = self.scaler.transform(data.reshape(-1, 1))
-        return scaled.flatten()
+            self._tmin = float(data.min())
+            # A constant series maps to 0 rather than dividing by zero (as MinMaxScaler does)
+            self._trange = float(data.max()) - self._tmin or 1.0
+        return (data - self._tmin) / self._trange
     
     def inverse_scale(self, data):
         """Inverse transform scaled data"""
-        return self.scaler.inverse_transform(data.reshape(-1, 1)).flatten()
+        return np.ravel(data) * self._trange + self._tmin
     
-    def prepare_lstm_data(self, df, sequence_length=24, target_column='energy_demand'):
-        """Prepare data for LSTM model"""
-        # Create features
+    def _build_features(self, df, target_column):
+        """Engineer LSTM features; returns (feature frame, feature column names)"""
+        # create_time_features returns a new frame, so the caller's df is never touched
+        # and the later steps can skip their defensive copies
         df = self.create_time_features(df)
-        df = self.create_lag_features(df, target_column)
-        df = self.create_rolling_features(df, target_column)
-        df = self.handle_missing_values(df)
+        df = self.create_lag_features(df, target_column, copy=False)
+        df = self.create_rolling_features(df, target_column, copy=False)
+        df = self.handle_missing_values(df, copy=False)
         
         # Select feature columns
         feature_columns = [
@@ -100,29 +136,64 @@ class DataPreprocessor:
         # Ensure all feature columns exist
         feature_columns = [col for col in feature_columns if col in df.columns]
         
+        return df, feature_columns
+    
+    def prepare_lstm_data(self, df, sequence_length=24, target_column='energy_demand'):
+        """Prepare data for LSTM model"""
+        df, feature_columns = self._build_features(df, target_column)
+        
         # Scale target
         target_data = df[target_column].values
         scaled_target = self.scale_features(target_data, fit=True)
         
-        # Scale features
+        # Scale features (MinMaxScaler keeps float32 input in float32)
         if len(feature_columns) > 0:
-            feature_data = df[feature_columns].values
+            feature_data = df[feature_columns].to_numpy(dtype=np.float32)
             scaled_features = self.feature_scaler.fit_transform(feature_data)
         else:
-            scaled_features = np.zeros((len(df), 1))
-        
-        # Create sequences
-        X, y = [], []
-        for i in range(sequence_length, len(scaled_target)):
-            # Combine target history with features
-            target_seq = scaled_target[i-sequence_length:i].reshape(-1, 1)
-            feature_seq = scaled_features[i-sequence_length:i]
-            
-            combined_seq = np.concatenate([target_seq, feature_seq], axis=1)
-            X.append(combined_seq)
-            y.append(scaled_target[i])
-        
-        return np.array(X), np.array(y), feature_columns
+            scaled_features = np.zeros((len(df), 1), dtype=np.float32)
+        
+        # Combine target history with features; model inputs are float32 (halves the
+        # bandwidth of every training pass, and [0, 1] scaled values need no more precision)
+        combined = np.column_stack([scaled_target, scaled_features]).astype(np.float32, copy=False)
+        
+        if len(combined) <= sequence_length:
+            return (np.empty((0, sequence_length, combined.shape[1]), dtype=np.float32),
+                    np.empty(0, dtype=np.float32), feature_columns)
+        
+        # Create sequences as strided windows: X[k] = combined[k:k+sequence_length]
+        windows = np.lib.stride_tricks.sliding_window_view(combined, sequence_length, axis=0)
+        X = windows[:-1].transpose(0, 2, 1)
+        y = scaled_target[sequence_length:].astype(np.float32, copy=False)
+        
+        return X, y, feature_columns
+    
+    def last_sequence(self, df, sequence_length=24, target_column='energy_demand'):
+        """
+        Latest LSTM input window (same as prepare_lstm_data's X[-1:]) as a
+        (1, sequence_length, n_features) array, using the scalers fit in training
+        Only the tail needed by the lag/rolling features is transformed
+        """
+        if self._tmin is None:
+            # Scalers not fit yet (e.g. models loaded from disk): fall back to the full pass
+            X, _, _ = self.prepare_lstm_data(df, sequence_length, target_column)
+            return X[-1:]
+        
+        lookback = max(config.LAG_FEATURES + ROLLING_WINDOWS)
+        df, feature_columns = self._build_features(df.tail(sequence_length + 1 + lookback), target_column)
+        
+        if len(df) <= sequence_length:
+            return np.empty((0, sequence_length, len(feature_columns) + 1))
+        
+        # X[-1] stops one row short of the end (that row is its training target)
+        window = df.iloc[-(sequence_length + 1):-1]
+        scaled_target = self.scale_features(window[target_column].values, fit=False)
+        if len(feature_columns) > 0:
+            scaled_features = self.feature_scaler.transform(window[feature_columns].to_numpy(dtype=np.float32))
+        else:
+            scaled_features = np.zeros((len(window), 1), dtype=np.float32)
+        
+        return np.column_stack([scaled_target, scaled_features]).astype(np.float32, copy=False)[np.newaxis]
     
     def prepare_prophet_data(self, df, target_column='energy_demand'):
         """Prepare data for Prophet model"""
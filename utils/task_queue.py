@@ -0,0 +1,61 @@
+"""
+Background Task Queue
+Runs long forecast jobs off the request thread and tracks them by job id
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+class TaskQueue:
+    def __init__(self, max_workers=config.TASK_QUEUE_WORKERS, max_jobs=256):
+        """
+        max_workers: number of background worker threads
+        max_jobs: number of job results kept for polling
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def submit(self, func, *args, **kwargs):
+        """Schedule func(*args, **kwargs) and return its job id"""
+        job_id = uuid.uuid4().hex
+        future = self.executor.submit(func, *args, **kwargs)
+        
+        with self.lock:
+            self.jobs[job_id] = future
+            
+            # Forget the oldest finished jobs once over capacity
+            while len(self.jobs) > self.max_jobs:
+                oldest = next(iter(self.jobs.values()))
+                if not oldest.done():
+                    break
+                self.jobs.popitem(last=False)
+        
+        return job_id
+    
+    def get_status(self, job_id):
+        """Get job status and result; None if the job id is unknown"""
+        with self.lock:
+            future = self.jobs.get(job_id)
+        
+        if future is None:
+            return None
+        if not future.done():
+            return {'status': 'running' if future.running() else 'pending'}
+        
+        error = future.exception()
+        if error is not None:
+            return {'status': 'failed', 'error': str(error)}
+        
+        return {'status': 'done', 'result': future.result()}
+
+def should_run_async(args, hours):
+    """Offload a request when the client passes async=1 and the horizon is long"""
+    return args.get('async') == '1' and hours > config.SYNC_FORECAST_MAX_HOURS
+
+# Shared queue for all forecast endpoints
+task_queue = TaskQueue()
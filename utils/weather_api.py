@@ -3,22 +3,94 @@ Real-time Weather API Integration
 Fetches current weather data to enhance energy demand predictions
 """
 
+import asyncio
+from collections import OrderedDict
 import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import threading
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+OWM_BASE_URL = "https://api.openweathermap.org/data/2.5"
+RESPONSE_TTL_SECONDS = 300  # OpenWeatherMap updates roughly every 10 minutes
+RESPONSE_CACHE_SIZE = 128  # Distinct (endpoint, params) responses kept, e.g. one per polled location
+# Retry policy shared by the pooled requests session and the aiohttp path
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.2  # seconds, doubled on each further retry
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Simulated weather: normal (mean, std) of temperature noise (°C), humidity (%), pressure (hPa), wind (m/s)
+WEATHER_LOC = np.array([0.0, 60.0, 1013.0, 5.0])
+WEATHER_SCALE = np.array([2.0, 10.0, 5.0, 2.0])
+WEATHER_CONDITIONS = np.array(['Clear', 'Clouds', 'Rain', 'Partly Cloudy'], dtype=object)
 
 class WeatherAPI:
-    def __init__(self, api_key=None, location="New York"):
+    def __init__(self, api_key=None, location="New York", seed=None):
         """
         Initialize Weather API client
         For production, use OpenWeatherMap or similar service
         For demo, we'll simulate weather data
+        seed: seed for the simulated weather (None for fresh entropy)
         """
+        self.rng = np.random.default_rng(seed)
         self.api_key = api_key or os.environ.get('WEATHER_API_KEY')
         self.location = location
         self.use_simulation = True  # Set to False when API key is available
         
+        # One pooled session for every request (reuses TCP/TLS connections), retrying transient errors
+        self._session = requests.Session()
+        retries = Retry(total=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF, status_forcelist=RETRY_STATUSES)
+        self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retries))
+        
+        # Recent API responses by (endpoint, params), oldest first, so repeated polls skip
+        # the round-trip; bounded by RESPONSE_CACHE_SIZE and RESPONSE_TTL_SECONDS
+        self._responses = OrderedDict()
+        self._responses_lock = threading.Lock()
+    
+    def _cached_response(self, key):
+        """Cached response for key if younger than RESPONSE_TTL_SECONDS, else None"""
+        with self._responses_lock:
+            cached = self._responses.get(key)
+            if cached is not None and time.monotonic() - cached[0] < RESPONSE_TTL_SECONDS:
+                return cached[1]
+        return None
+    
+    def _store_response(self, key, data):
+        """Cache a response, dropping expired entries and then the oldest beyond RESPONSE_CACHE_SIZE"""
+        now = time.monotonic()
+        with self._responses_lock:
+            self._responses[key] = (now, data)
+            self._responses.move_to_end(key)
+            # Entries are in insertion-time order, so the expired ones are at the front
+            while self._responses and (
+                len(self._responses) > RESPONSE_CACHE_SIZE
+                or now - next(iter(self._responses.values()))[0] >= RESPONSE_TTL_SECONDS
+            ):
+                self._responses.popitem(last=False)
+    
+    def _get_json(self, endpoint, params):
+        """GET an OpenWeatherMap endpoint, serving responses younger than RESPONSE_TTL_SECONDS from memory"""
+        key = (endpoint, tuple(sorted(params.items())))
+        data = self._cached_response(key)
+        if data is not None:
+            return data
+        
+        response = self._session.get(f"{OWM_BASE_URL}/{endpoint}", params=params, timeout=5)
+        response.raise_for_status()
+        data = response.json()
+        
+        self._store_response(key, data)
+        return data
+        
     def get_current_weather(self):
         """Get current weather conditions"""
         if self.use_simulation:
@@ -26,41 +98,116 @@ class WeatherAPI:
         
         # Real API integration (requires API key)
         try:
-            url = f"https://api.openweathermap.org/data/2.5/weather"
             params = {
                 'q': self.location,
                 'appid': self.api_key,
                 'units': 'metric'
             }
-            response = requests.get(url, params=params, timeout=5)
-            data = response.json()
+            data = self._get_json('weather', params)
             
-            return {
-                'temperature': data['main']['temp'],
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'wind_speed': data['wind']['speed'],
-                'conditions': data['weather'][0]['main'],
-                'timestamp': datetime.now()
-            }
+            return self._parse_current(data)
         except Exception as e:
             print(f"Weather API error: {e}, using simulation")
             return self._simulate_weather()
     
+    def _parse_current(self, data):
+        """Current-weather record from an OpenWeatherMap /weather response"""
+        return {
+            'temperature': data['main']['temp'],
+            'humidity': data['main']['humidity'],
+            'pressure': data['main']['pressure'],
+            'wind_speed': data['wind']['speed'],
+            'conditions': data['weather'][0]['main'],
+            'timestamp': datetime.now()
+        }
+    
+    async def get_current_weather_many(self, locations):
+        """
+        Current weather for several locations, with the HTTP round-trips overlapped
+        Returns a DataFrame with one row per location (in order); a location whose request
+        fails gets a simulated row. Uses aiohttp when installed, otherwise worker threads;
+        either way failed rows are simulated afterwards on this thread, since the shared
+        Generator is not thread-safe
+        """
+        locations = list(locations)
+        
+        if self.use_simulation:
+            records = [self._simulate_weather() for _ in locations]
+        elif aiohttp is None:
+            records = await asyncio.gather(*(
+                asyncio.to_thread(self._current_weather_at, location) for location in locations
+            ))
+        else:
+            timeout = aiohttp.ClientTimeout(total=5)
+            connector = aiohttp.TCPConnector(limit=50)
+            async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+                records = await asyncio.gather(*(
+                    self._fetch_current_async(session, location) for location in locations
+                ))
+        records = [record if record is not None else self._simulate_weather() for record in records]
+        
+        fields = ['temperature', 'humidity', 'pressure', 'wind_speed', 'conditions', 'timestamp']
+        return pd.DataFrame({
+            'location': locations,
+            **{field: [record[field] for record in records] for field in fields}
+        })
+    
+    def _current_weather_at(self, location):
+        """Blocking current-weather fetch for one location (None on failure)"""
+        try:
+            params = {'q': location, 'appid': self.api_key, 'units': 'metric'}
+            return self._parse_current(self._get_json('weather', params))
+        except Exception as e:
+            print(f"Weather API error for {location}: {e}, using simulation")
+            return None
+    
+    async def _fetch_current_async(self, session, location):
+        """Current-weather fetch for one location on a shared aiohttp session (None on failure)"""
+        try:
+            params = {'q': location, 'appid': self.api_key, 'units': 'metric'}
+            return self._parse_current(await self._get_json_async(session, 'weather', params))
+        except Exception as e:
+            print(f"Weather API error for {location}: {e}, using simulation")
+            return None
+    
+    async def _get_json_async(self, session, endpoint, params):
+        """aiohttp counterpart of _get_json: same response cache, same retry policy as the session"""
+        key = (endpoint, tuple(sorted(params.items())))
+        data = self._cached_response(key)
+        if data is not None:
+            return data
+        
+        for attempt in range(RETRY_TOTAL + 1):
+            retry = attempt < RETRY_TOTAL
+            try:
+                async with session.get(f"{OWM_BASE_URL}/{endpoint}", params=params) as response:
+                    if not (retry and response.status in RETRY_STATUSES):
+                        response.raise_for_status()
+                        data = await response.json()
+                        break
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not retry:
+                    raise
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+        
+        self._store_response(key, data)
+        return data
+    
     def _simulate_weather(self):
         """Simulate realistic weather data"""
-        import numpy as np
-        
         # Simulate temperature based on time of day
         hour = datetime.now().hour
         base_temp = 20 + 10 * np.sin((hour - 6) * np.pi / 12)
         
+        # Temperature noise, humidity, pressure and wind speed in one draw
+        temp_noise, humidity, pressure, wind_speed = self.rng.normal(WEATHER_LOC, WEATHER_SCALE)
+        
         return {
-            'temperature': round(base_temp + np.random.normal(0, 2), 1),
-            'humidity': round(60 + np.random.normal(0, 10), 1),
-            'pressure': round(1013 + np.random.normal(0, 5), 1),
-            'wind_speed': round(abs(np.random.normal(5, 2)), 1),
-            'conditions': np.random.choice(['Clear', 'Clouds', 'Rain', 'Partly Cloudy']),
+            'temperature': round(base_temp + temp_noise, 1),
+            'humidity': round(humidity, 1),
+            'pressure': round(pressure, 1),
+            'wind_speed': round(abs(wind_speed), 1),
+            'conditions': self.rng.choice(WEATHER_CONDITIONS),
             'timestamp': datetime.now()
         }
     
@@ -71,80 +218,72 @@ class WeatherAPI:
         
         # Real API integration
         try:
-            url = f"https://api.openweathermap.org/data/2.5/forecast"
             params = {
                 'q': self.location,
                 'appid': self.api_key,
                 'units': 'metric',
                 'cnt': min(hours // 3, 40)  # API returns 3-hour intervals
             }
-            response = requests.get(url, params=params, timeout=5)
-            data = response.json()
+            data = self._get_json('forecast', params)
             
-            forecast = []
-            for item in data['list']:
-                forecast.append({
-                    'timestamp': datetime.fromtimestamp(item['dt']),
-                    'temperature': item['main']['temp'],
-                    'humidity': item['main']['humidity'],
-                    'pressure': item['main']['pressure'],
-                    'wind_speed': item['wind']['speed'],
-                    'conditions': item['weather'][0]['main']
-                })
-            
-            return pd.DataFrame(forecast)
+            # Gather each column once and build the frame in a single columnar call
+            items = data['list']
+            return pd.DataFrame({
+                'timestamp': [datetime.fromtimestamp(item['dt']) for item in items],
+                'temperature': [item['main']['temp'] for item in items],
+                'humidity': [item['main']['humidity'] for item in items],
+                'pressure': [item['main']['pressure'] for item in items],
+                'wind_speed': [item['wind']['speed'] for item in items],
+                'conditions': [item['weather'][0]['main'] for item in items]
+            })
         except Exception as e:
             print(f"Weather forecast error: {e}, using simulation")
             return self._simulate_forecast(hours)
     
     def _simulate_forecast(self, hours):
         """Simulate weather forecast"""
-        import numpy as np
-        from datetime import timedelta
+        timestamps = pd.date_range(datetime.now(), periods=hours, freq='H')
+        hour = timestamps.hour.to_numpy()
+        base_temp = 20 + 10 * np.sin((hour - 6) * np.pi / 12)
         
-        forecast = []
-        base_time = datetime.now()
+        # One (4, hours) draw: temperature noise, humidity, pressure, wind speed
+        temp_noise, humidity, pressure, wind_speed = self.rng.normal(
+            WEATHER_LOC[:, None], WEATHER_SCALE[:, None], (4, hours)
+        )
         
-        for i in range(hours):
-            hour = (base_time + timedelta(hours=i)).hour
-            base_temp = 20 + 10 * np.sin((hour - 6) * np.pi / 12)
-            
-            forecast.append({
-                'timestamp': base_time + timedelta(hours=i),
-                'temperature': round(base_temp + np.random.normal(0, 2), 1),
-                'humidity': round(60 + np.random.normal(0, 10), 1),
-                'pressure': round(1013 + np.random.normal(0, 5), 1),
-                'wind_speed': round(abs(np.random.normal(5, 2)), 1),
-                'conditions': np.random.choice(['Clear', 'Clouds', 'Rain', 'Partly Cloudy'])
-            })
-        
-        return pd.DataFrame(forecast)
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'temperature': (base_temp + temp_noise).round(1),
+            'humidity': humidity.round(1),
+            'pressure': pressure.round(1),
+            'wind_speed': np.abs(wind_speed).round(1),
+            'conditions': self.rng.choice(WEATHER_CONDITIONS, size=hours)
+        })
     
     def calculate_weather_impact(self, temperature, humidity=None):
         """
         Calculate weather impact on energy demand
         Based on temperature deviation from comfort zone (18-24°C)
+        temperature/humidity may be scalars or arrays (e.g. forecast columns) of matching shape;
+        scalars return a float, arrays an ndarray of per-hour impacts
         """
         comfort_zone = (18, 24)
+        temperature = np.asarray(temperature, dtype=np.float64)
         
-        if temperature < comfort_zone[0]:
-            # Cold weather - heating demand
-            impact = (comfort_zone[0] - temperature) * 80  # MW per degree
-        elif temperature > comfort_zone[1]:
-            # Hot weather - cooling demand
-            impact = (temperature - comfort_zone[1]) * 100  # MW per degree
-        else:
-            # Comfortable temperature - minimal impact
-            impact = 0
+        # Cold weather - heating demand; hot weather - cooling demand (MW per degree);
+        # at most one term is non-zero, and both are zero inside the comfort zone
+        impact = (np.clip(comfort_zone[0] - temperature, 0, None) * 80
+                  + np.clip(temperature - comfort_zone[1], 0, None) * 100)
         
         # Humidity adjustment (optional)
         if humidity is not None:
-            if humidity > 70:
-                impact *= 1.1  # High humidity increases cooling demand
-            elif humidity < 30:
-                impact *= 1.05  # Low humidity increases heating demand
+            humidity = np.asarray(humidity, dtype=np.float64)
+            # High humidity increases cooling demand, low humidity increases heating demand
+            impact = impact * np.where(humidity > 70, 1.1, np.where(humidity < 30, 1.05, 1.0))
         
-        return round(impact, 2)
+        if impact.ndim == 0:
+            return round(float(impact), 2)
+        return impact.round(2)
 
 if __name__ == "__main__":
     # Test weather API
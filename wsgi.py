@@ -0,0 +1,19 @@
+"""
+WSGI entry point for production servers
+Run with: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import importlib
+import os
+
+# app_lite (sklearn) by default; set WSGI_APP_MODULE=app for the TensorFlow build
+module = importlib.import_module(os.environ.get('WSGI_APP_MODULE', 'app_lite'))
+
+with module.app.app_context():
+    module.initialize_system()
+
+app = module.app
+
+def start_background_tasks():
+    """Start the app's background threads; called from gunicorn's post_worker_init hook"""
+    getattr(module, 'start_background_tasks', lambda: None)()